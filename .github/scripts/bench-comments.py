@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""create-pr.py のコメント探索ベンチマーク
+
+合成した大量コメント（既定 10,000件）の Issue に対して、最新の claude コメントを探す2つの方法を比べる。
+
+- full: 全コメントを古い順に取得して1つのJSON配列にし、json.loads してから reversed で探す（従来の gh issue view 相当）
+- newest-first: create-pr.py の iter_comments_newest_first() で新しい順に1ページずつ取得し、見つかった時点で止める
+
+ネットワークの代わりに、事前にシリアライズしたページを返すスタブを使う（--rtt-ms で1往復の遅延を足せる）。
+各方法の所要時間（中央値）・リクエスト数・tracemalloc のピークメモリを報告する。
+
+Usage:
+    python3 .github/scripts/bench-comments.py
+    python3 .github/scripts/bench-comments.py --comments 10000 --claude-depth 250 --rtt-ms 50 --json comments.json
+"""
+
+import argparse
+import importlib.util
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+SCRIPT = Path(__file__).with_name("create-pr.py")
+
+
+def load_create_pr():
+    """ハイフン入りのファイル名なので importlib で読み込む"""
+    spec = importlib.util.spec_from_file_location("create_pr", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_fixture(count: int, body_bytes: int, claude_depth: int) -> list[dict]:
+    """古い順のコメント一覧を作る（新しい方から claude_depth 番目が最新の claude コメント）"""
+    filler = ("bot log line " * (body_bytes // 13 + 1))[:body_bytes]
+    comments = [
+        {"author": {"login": "github-actions"}, "body": f"#{i} {filler}"}
+        for i in range(count)
+    ]
+    # 一番古いコメントも claude にして、最新の方を選べているか確かめる
+    comments[0]["author"]["login"] = "claude"
+    if claude_depth < count - 1:
+        comments[count - 1 - claude_depth] = {
+            "author": {"login": "claude"},
+            "body": "done\n---\nsummary [Create PR](https://github.com/o/r/compare/main...b?title=T&body=B)",
+        }
+    return comments
+
+
+class StubGitHub:
+    """コメントのページを返すスタブ（cursor はコメントの添字）"""
+
+    def __init__(self, comments: list[dict], page_size: int, rtt: float):
+        self.rtt = rtt
+        self.requests = 0
+        # ページは事前にシリアライズしておき、計測対象から外す
+        self.pages = {}
+        end = len(comments)
+        while end > 0:
+            start = max(0, end - page_size)
+            self.pages[end] = json.dumps({"repository": {"issue": {"comments": {
+                "pageInfo": {"hasPreviousPage": start > 0, "startCursor": str(start)},
+                "nodes": comments[start:end],
+            }}}}).encode("utf-8")
+            end = start
+        self.total = len(comments)
+        self.full_array = json.dumps(comments).encode("utf-8")
+
+    def query(self, query: str, variables: dict) -> dict:
+        self.requests += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+        cursor = variables.get("cursor")
+        return json.loads(self.pages[int(cursor) if cursor else self.total])
+
+    def fetch_all(self) -> str:
+        """全ページを取得した結果（gh issue view --json comments の出力）"""
+        self.requests += len(self.pages)
+        if self.rtt:
+            time.sleep(self.rtt * len(self.pages))
+        return self.full_array.decode("utf-8")
+
+
+def run_full(create_pr, stub: StubGitHub) -> str:
+    comments = json.loads(stub.fetch_all())
+    return create_pr.find_claude_comment(reversed(comments))
+
+
+def run_newest_first(create_pr, stub: StubGitHub) -> str:
+    comments = create_pr.iter_comments_newest_first(stub.query, ("o", "r"), "1")
+    return create_pr.find_claude_comment(comments)
+
+
+def measure(runner, create_pr, stub: StubGitHub, runs: int) -> dict:
+    times = []
+    for _ in range(runs):
+        stub.requests = 0
+        start = time.perf_counter()
+        result = runner(create_pr, stub)
+        times.append(time.perf_counter() - start)
+
+    stub.requests = 0
+    tracemalloc.start()
+    runner(create_pr, stub)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ms": statistics.median(times) * 1000,
+        "requests": stub.requests,
+        "peak_mb": peak / 1024 / 1024,
+        "found": result.startswith("done"),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="create-pr.py のコメント探索ベンチマーク")
+    parser.add_argument("--comments", type=int, default=10000, help="コメント数")
+    parser.add_argument("--body-bytes", type=int, default=500, help="1コメントの本文の長さ")
+    parser.add_argument("--claude-depth", type=int, default=30, help="最新の claude コメントが新しい方から何番目か")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="1リクエストあたりの疑似遅延ミリ秒")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数")
+    parser.add_argument("--json", type=str, default=None, help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+
+    create_pr = load_create_pr()
+    stub = StubGitHub(
+        build_fixture(args.comments, args.body_bytes, args.claude_depth),
+        create_pr.COMMENT_PAGE_SIZE, args.rtt_ms / 1000
+    )
+    print(f"fixture: {args.comments} comments, {len(stub.full_array) / 1024 / 1024:.1f} MB as JSON, "
+          f"claude at depth {args.claude_depth}")
+
+    results = {
+        "full": measure(run_full, create_pr, stub, args.runs),
+        "newest-first": measure(run_newest_first, create_pr, stub, args.runs),
+    }
+    for name, result in results.items():
+        print(f"{name:13}: {result['ms']:8.2f} ms  requests={result['requests']:4}  "
+              f"peak={result['peak_mb']:6.2f} MB  found={result['found']}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"args": vars(args), "results": results}, indent=2), encoding="utf-8")
+
+    if not all(result["found"] for result in results.values()):
+        print("[ERROR] claude comment was not found", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
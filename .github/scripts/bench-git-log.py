@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""git_stream.py のベンチマーク
+
+`git fast-import` で大量のコミット（既定 5,000件）を持つ一時リポジトリを作り、
+ブランチ上の最初のコミットメッセージを取り出す2つの方法を比べる。
+
+- buffered: `git log --pretty=format:%B%x00 --reverse` を subprocess.run で全部読み、split する（従来の create-pr.py）
+- streaming: git_stream.first_commit_body() で最初のレコードだけ読んで git を止める
+
+各方法の所要時間（中央値）と、パイプから読んだバイト数を報告する。
+
+Usage:
+    python3 .github/scripts/bench-git-log.py
+    python3 .github/scripts/bench-git-log.py --commits 20000 --body-bytes 2000 --json git-log.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from git_stream import git_log_records  # noqa: E402
+
+
+def build_repo(path: str, commits: int, body_bytes: int) -> None:
+    """main に1コミット、branch に commits 件のコミットを持つリポジトリを作る"""
+    subprocess.run(["git", "init", "-q", path], check=True)
+    filler = ("pasted log line\n" * (body_bytes // 16 + 1))[:body_bytes]
+    stream = []
+    when = 1700000000
+
+    def commit(ref: str, mark: int, parent: int | None, message: str) -> None:
+        data = message.encode("utf-8")
+        stream.append(f"commit {ref}\nmark :{mark}\ncommitter bench <bench@example.com> {when + mark} +0000\n")
+        stream.append(f"data {len(data)}\n{message}\n")
+        if parent:
+            stream.append(f"from :{parent}\n")
+
+    commit("refs/heads/main", 1, None, "base")
+    for i in range(commits):
+        commit("refs/heads/branch", i + 2, i + 1, f"commit {i}\n\n{filler}")
+    subprocess.run(
+        ["git", "fast-import", "--quiet"], cwd=path, input="".join(stream).encode("utf-8"), check=True
+    )
+
+
+def run_buffered(repo: str) -> tuple[str, int]:
+    result = subprocess.run(
+        ["git", "log", "main..branch", "--pretty=format:%B%x00", "--reverse"],
+        cwd=repo, capture_output=True, check=False
+    )
+    output = result.stdout.decode("utf-8").strip()
+    return (output.split("\x00")[0].strip() if output else ""), len(result.stdout)
+
+
+def run_streaming(repo: str) -> tuple[str, int]:
+    with git_log_records("main..branch", reverse=True, cwd=repo) as records:
+        body = next(records, "").strip()
+    return body, records.bytes_read
+
+
+def measure(runner, repo: str, runs: int) -> dict:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body, bytes_read = runner(repo)
+        times.append(time.perf_counter() - start)
+    return {"ms": statistics.median(times) * 1000, "bytes_read": bytes_read, "first_line": body.splitlines()[0]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="git_stream.py のベンチマーク")
+    parser.add_argument("--commits", type=int, default=5000, help="ブランチのコミット数")
+    parser.add_argument("--body-bytes", type=int, default=1000, help="1コミットのメッセージ本文の長さ")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数")
+    parser.add_argument("--json", type=str, default=None, help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = os.path.join(tmp, "repo")
+        start = time.perf_counter()
+        build_repo(repo, args.commits, args.body_bytes)
+        print(f"repo: {args.commits} commits built in {time.perf_counter() - start:.2f}s")
+
+        results = {
+            "buffered": measure(run_buffered, repo, args.runs),
+            "streaming": measure(run_streaming, repo, args.runs),
+        }
+
+    for name, result in results.items():
+        print(f"{name:10}: {result['ms']:8.2f} ms  read={result['bytes_read'] / 1024:9.1f} KiB  "
+              f"first={result['first_line']!r}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"args": vars(args), "results": results}, indent=2), encoding="utf-8")
+
+    if results["buffered"]["first_line"] != results["streaming"]["first_line"]:
+        print("[ERROR] streaming reader returned a different commit", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""merge-agent.py の Issue Body 解析ベンチマーク
+
+ログを貼り付けた数MBの Issue Body を合成し、キャラクターとタスクを取り出す3つの方法を比べる。
+
+- legacy: 本文を丸ごと stderr に出し、未コンパイルの re.search で2回走査する（従来の parse_issue_body）
+- single-pass: tokenize_issue_body() で1回だけ走査する（メモ化なし）
+- memoized: parse_issue_body() を同じ本文で呼び直す（2回目以降はハッシュ計算だけ）
+
+見出しが本文の先頭にある場合（--layout head）と、ログの後ろにある場合（--layout tail）を選べる。
+stderr への出力は /dev/null 相当に捨てて、書き出しのコストだけを含める。
+各方法の所要時間（中央値）と tracemalloc のピークメモリを報告する。
+計測の前に、見出しが行の途中にある本文（REGRESSION_BODIES）で single-pass が legacy と
+同じキャラクターとタスクを返すことも確かめる。
+
+Usage:
+    python3 .github/scripts/bench-issue-parser.py
+    python3 .github/scripts/bench-issue-parser.py --log-mb 16 --layout tail --json issue-parser.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+SCRIPT = Path(__file__).with_name("merge-agent.py")
+
+
+def load_merge_agent():
+    """ハイフン入りのファイル名なので importlib で読み込む"""
+    sys.path.insert(0, str(SCRIPT.parent))
+    spec = importlib.util.spec_from_file_location("merge_agent", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# 行の途中の `キャラクター:` / `タスク:`（従来の re.search は本文のどこにあっても拾っていた）
+REGRESSION_BODIES = [
+    "使用するキャラクター: implementer.md\nタスク: 直す",
+    "以下のキャラクター：reviewer で\n以下のタスク：レビュー",
+    "キャラクター: writer タスク: 書く",
+    "今回のキャラクター:\nimplementer.md\n\n今回のタスク:\nテストを足す",
+]
+
+
+def build_body(log_mb: float, layout: str) -> str:
+    """キャラクター・タスク3件・パラメータと、貼り付けたログを含む本文を作る"""
+    header = (
+        "下記のキャラクターを演じて\n"
+        "キャラクター: implementer\n\n"
+        "下記のタスクを処理\n"
+        "タスク: ビルドの失敗を直す\n"
+        "タスク:\n  1. ログを読む\n  2. 原因を特定する\n\n"
+        "タスク: 再発防止のテストを足す\n\n"
+        "パラメータ:\n- branch: main\n- retries: 3\n\n"
+    )
+    line = "2024-01-01T00:00:00Z [build] step 42/97: compiling module with flags -O2 -Wall\n"
+    log = "```\n" + line * int(log_mb * 1024 * 1024 / len(line)) + "```\n"
+    return header + log if layout == "head" else log + "\n" + header
+
+
+def legacy_parse(issue_body: str) -> dict:
+    """従来の parse_issue_body（比較用にそのまま残したもの）"""
+    print(f"[DEBUG] Issue Body:\n{issue_body}", file=sys.stderr)
+    character_match = re.search(r'キャラクター[：:]\s*([^\n]+)', issue_body)
+    character_file = character_match.group(1).strip() if character_match else None
+    task_match = re.search(r'タスク[：:]\s*([^\n]+)', issue_body)
+    task = task_match.group(1).strip() if task_match else None
+    return {"character_file": character_file, "task": task, "tasks": [task] if task else []}
+
+
+def check_regressions(tokenize) -> list[str]:
+    """REGRESSION_BODIES で legacy と結果が違うものを文字列のリストで返す"""
+    failures = []
+    with contextlib.redirect_stderr(io.StringIO()):
+        for body in REGRESSION_BODIES:
+            expected = legacy_parse(body)
+            parsed = tokenize(body)
+            got = (parsed["character_file"], parsed["task"])
+            if got != (expected["character_file"], expected["task"]):
+                failures.append(f"{body!r}: {got} != {(expected['character_file'], expected['task'])}")
+    return failures
+
+
+def measure(runner, body: str, runs: int, warm=None) -> dict:
+    times = []
+    with contextlib.redirect_stderr(io.StringIO()) as sink:
+        if warm:
+            warm(body)
+        for _ in range(runs):
+            sink.seek(0)
+            sink.truncate()
+            start = time.perf_counter()
+            result = runner(body)
+            times.append(time.perf_counter() - start)
+        logged = sink.tell()
+
+        tracemalloc.start()
+        runner(body)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "ms": statistics.median(times) * 1000,
+        "peak_mb": peak / 1024 / 1024,
+        "logged_kb": logged / 1024,
+        "character": result["character_file"],
+        "tasks": len(result["tasks"]),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="merge-agent.py の Issue Body 解析ベンチマーク")
+    parser.add_argument("--log-mb", type=float, default=4.0, help="貼り付けたログの大きさ（MB）")
+    parser.add_argument("--layout", choices=["head", "tail"], default="head", help="見出しをログの前後どちらに置くか")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数")
+    parser.add_argument("--json", type=str, default=None, help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+
+    merge_agent = load_merge_agent()
+    failures = check_regressions(merge_agent.tokenize_issue_body)
+    for failure in failures:
+        print(f"[ERROR] single-pass parser differs from legacy: {failure}", file=sys.stderr)
+    if failures:
+        return 1
+
+    body = build_body(args.log_mb, args.layout)
+    print(f"body: {len(body.encode('utf-8')) / 1024 / 1024:.1f} MB, headings at {args.layout}")
+
+    results = {
+        "legacy": measure(legacy_parse, body, args.runs),
+        "single-pass": measure(merge_agent.tokenize_issue_body, body, args.runs),
+        "memoized": measure(merge_agent.parse_issue_body, body, args.runs, warm=merge_agent.parse_issue_body),
+    }
+    for name, result in results.items():
+        print(f"{name:12}: {result['ms']:8.2f} ms  peak={result['peak_mb']:6.2f} MB  "
+              f"logged={result['logged_kb']:9.1f} KiB  character={result['character']} tasks={result['tasks']}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"args": vars(args), "results": results}, indent=2), encoding="utf-8")
+
+    if results["single-pass"]["tasks"] != 3 or results["single-pass"]["character"] != "implementer":
+        print("[ERROR] single-pass parser missed the character or a task", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""generate-header.py の起動時間ベンチマーク
+
+`python3 -X importtime` で generate-header.py のSVG生成を何度か起動し、
+素の `python3 -c pass` との差（スクリプト分の起動コスト）と、
+スクリプトが追加で import したモジュールを報告する。
+
+SVGの高速起動パスで読み込んではいけないモジュールが読み込まれた場合や、
+起動コストの中央値が --max-ms を超えた場合は終了コード1で失敗する。
+
+Usage:
+    python3 .github/scripts/bench-startup.py
+    python3 .github/scripts/bench-startup.py --runs 20 --max-ms 30 --json startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).with_name("generate-header.py")
+
+# SVGの高速起動パスでは読み込まないはずのモジュール
+FORBIDDEN_ON_SVG_PATH = [
+    "argparse",
+    "pathlib",
+    "functools",
+    "re",
+    "json",
+    "hashlib",
+    "shutil",
+    "tempfile",
+    "urllib",
+    "http",
+    "asyncio",
+    "concurrent",
+    "fal_client",
+]
+
+
+def run_once(cmd: list[str]) -> tuple[float, dict[str, int]]:
+    """1回起動して (経過秒, {モジュール名: 累積import時間us}) を返す"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *cmd],
+        capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return elapsed, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="generate-header.py の起動時間ベンチマーク")
+    parser.add_argument("--runs", type=int, default=10, help="起動回数")
+    parser.add_argument("--max-ms", type=float, default=None, help="起動コスト（中央値）の上限ミリ秒")
+    parser.add_argument("--json", type=str, default=None, help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        header_cmd = [
+            str(SCRIPT), "--tag", "v1.2.3", "--theme", "auto", "--format", "svg",
+            "--output", str(Path(tmp) / "header.svg")
+        ]
+
+        # ウォームアップ（ディスクキャッシュと .pyc を温める）
+        run_once(["-c", "pass"])
+        run_once(header_cmd)
+
+        base_times, header_times = [], []
+        base_modules, header_modules = {}, {}
+        for _ in range(args.runs):
+            elapsed, base_modules = run_once(["-c", "pass"])
+            base_times.append(elapsed)
+            elapsed, header_modules = run_once(header_cmd)
+            header_times.append(elapsed)
+
+    extra_modules = {name: us for name, us in header_modules.items() if name not in base_modules}
+    overhead_ms = (statistics.median(header_times) - statistics.median(base_times)) * 1000
+    forbidden = sorted(
+        name for name in extra_modules
+        if name.split(".")[0] in FORBIDDEN_ON_SVG_PATH
+    )
+
+    print(f"python -c pass        : {statistics.median(base_times) * 1000:.1f} ms (median of {args.runs})")
+    print(f"generate-header (svg) : {statistics.median(header_times) * 1000:.1f} ms (median of {args.runs})")
+    print(f"startup overhead      : {overhead_ms:.1f} ms")
+    print(f"extra imports         : {len(extra_modules)}")
+    for name, us in sorted(extra_modules.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {us / 1000:7.2f} ms  {name}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "runs": args.runs,
+            "base_ms": statistics.median(base_times) * 1000,
+            "header_ms": statistics.median(header_times) * 1000,
+            "overhead_ms": overhead_ms,
+            "extra_imports": extra_modules,
+        }, indent=2), encoding="utf-8")
+
+    failed = False
+    if forbidden:
+        print(f"[ERROR] SVG path imported: {', '.join(forbidden)}", file=sys.stderr)
+        failed = True
+    if args.max_ms is not None and overhead_ms > args.max_ms:
+        print(f"[ERROR] startup overhead {overhead_ms:.1f} ms exceeds {args.max_ms} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""スクリプトのホットな関数のベンチマークスイート
+
+generate-header.py・merge-agent.py・create-pr.py の主な関数を、実際に近いフィクスチャと
+負荷の高いフィクスチャで動かし、1件あたりのスループットとピークメモリを記録する。
+gh・git・fal.ai はすべてローカルの代役に置き換える（ネットワークにも GitHub にも出ない）。
+
+- git: `git fast-import` で大量のタグ（既定 3,000件）を持つ一時リポジトリ
+- gh: コメントのページを返すスタブの run_query（10,000件）
+- fal.ai: 画像URLを返し、そのURLでPNGを配信するスレッド版HTTPスタブ
+
+ベンチマーク（--only で絞り込める）:
+
+- svg.render:        generate_svg() で 10タグ × 5パターン × 5カラーマップ（1200x315）
+- svg.render_large:  generate_svg() で 16000x5333・パーティクル5,000個
+- svg.gallery:       render_gallery() で 100タグ × 5パターン × 2カラーマップを1つの文書に
+- tags.resolve:      resolve_tag_range() で全タグを解決
+- tags.previous:     tag_index.TagIndex で全タグの1つ前のリリースを引く
+- theme.detect:      detect_theme_from_tag() を全タグに適用
+- diff.digest:       diff_digest.build_digest() で 300ファイル書き換え + 10万行の lockfile の差分を要約
+- prompt.build:      build_prompt() を 全タグ × 全テーマ
+- issue.parse_huge:  tokenize_issue_body() でログを貼った 8MB の本文
+- issue.parse_many:  parse_issue_body() で別々の 2,000件の本文
+- claude_md.create:  create_claude_md() を実際のエージェントファイル × 500タスク
+- comments.find:     iter_comments_newest_first() + find_claude_comment() で10,000件を遡る
+- pr.build:          build_pr_content()（Create PR リンクのURL解析とタスクサマリー）1,000件
+- fal.batch:         generate_png_batch() でスタブに 32件のPNGを並行生成
+
+結果はベースライン（既定 bench-baseline.json）と比べ、スループットが --tolerance より
+下がるか、ピークメモリが --tolerance より増えたら終了コード1で失敗する。
+ベースラインはマシンごとの値なので、計測環境を変えたら --update-baseline で取り直す。
+共有ランナーでは数十%のぶれがあるため、既定の許容幅は大きな後退だけを拾う 50% にしている。
+
+Usage:
+    python3 .github/scripts/bench-suite.py
+    python3 .github/scripts/bench-suite.py --only svg,issue --runs 3
+    python3 .github/scripts/bench-suite.py --update-baseline
+    python3 .github/scripts/bench-suite.py --json suite.json --tolerance 0.3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+DEFAULT_BASELINE = SCRIPTS_DIR / "bench-baseline.json"
+# ピークメモリは小さい値だとぶれるので、この分までは増えても許容する
+MEMORY_SLACK_MB = 1.0
+
+
+def load_script(file_name: str, module_name: str):
+    """ハイフン入りのファイル名なので importlib で読み込む"""
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / file_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- 代役 ------------------------------------------------------------------
+
+def build_tag_repo(path: str, count: int) -> list[str]:
+    """count 件のタグ（v0.1.0 から始まる semver）を持つリポジトリを作り、タグ一覧を返す"""
+    subprocess.run(["git", "init", "-q", path], check=True)
+    tags = []
+    major, minor, patch = 0, 1, 0
+    for i in range(count):
+        tags.append(f"v{major}.{minor}.{patch}")
+        patch += 1
+        if patch > 9:
+            patch = 0
+            minor += 1
+        if minor > 12:
+            minor = 0
+            major += 1
+    stream = [
+        "commit refs/heads/main\nmark :1\ncommitter bench <bench@example.com> 1700000000 +0000\n"
+        "data 4\nbase\n"
+    ]
+    stream += [f"reset refs/tags/{tag}\nfrom :1\n\n" for tag in tags]
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=path, input="".join(stream).encode("utf-8"), check=True)
+    return tags
+
+
+def build_diff_repo(path: str, sources: int, lines: int) -> int:
+    """タグ v1..v2 の間で sources 個のソースを書き換え、大きな lockfile を足したリポジトリを作り、変更ファイル数を返す"""
+    subprocess.run(["git", "init", "-q", path], check=True)
+
+    def modify(name: str, text: str) -> str:
+        return f"M 644 inline {name}\ndata {len(text.encode('utf-8'))}\n{text}\n"
+
+    def commit(mark: int, files: dict[str, str]) -> str:
+        parent = f"from :{mark - 1}\n" if mark > 1 else ""
+        return (f"commit refs/heads/main\nmark :{mark}\ncommitter bench <bench@example.com> 1700000000 +0000\n"
+                f"data 3\nv{mark}\n{parent}" + "".join(modify(name, text) for name, text in files.items())
+                + f"\nreset refs/tags/v{mark}\nfrom :{mark}\n\n")
+
+    old = {f"src/pkg{i % 10}/module{i}.py": "".join(f"value_{n} = {n}\n" for n in range(lines)) for i in range(sources)}
+    new = {name: "".join(f"value_{n} = {n * 2}\n" for n in range(lines)) for name in old}
+    new["package-lock.json"] = "".join(f'"dep-{n}": "1.0.{n}",\n' for n in range(100_000))
+    stream = commit(1, old) + commit(2, new)
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=path, input=stream.encode("utf-8"), check=True)
+    return len(new)
+
+
+def build_comments(count: int, claude_depth: int) -> list[dict]:
+    """古い順のコメント一覧（新しい方から claude_depth 番目が最新の claude コメント）"""
+    filler = ("bot log line " * 40)[:500]
+    comments = [{"author": {"login": "github-actions"}, "body": f"#{i} {filler}"} for i in range(count)]
+    comments[count - 1 - claude_depth] = {
+        "author": {"login": "claude"},
+        "body": "done\n---\nsummary [Create PR](https://github.com/o/r/compare/main...b?title=T&body=B)",
+    }
+    return comments
+
+
+class StubCommentPages:
+    """iter_comments_newest_first() 用の run_query（ページは事前にシリアライズしておく）"""
+
+    def __init__(self, comments: list[dict], page_size: int):
+        self.pages = {}
+        end = len(comments)
+        while end > 0:
+            start = max(0, end - page_size)
+            self.pages[end] = json.dumps({"repository": {"issue": {"comments": {
+                "pageInfo": {"hasPreviousPage": start > 0, "startCursor": str(start)},
+                "nodes": comments[start:end],
+            }}}})
+            end = start
+        self.total = len(comments)
+
+    def query(self, query: str, variables: dict) -> dict:
+        cursor = variables.get("cursor")
+        return json.loads(self.pages[int(cursor) if cursor else self.total])
+
+
+class StubFal:
+    """fal.ai の代役: POST に画像URLを返し、GET でそのPNGを返す"""
+
+    def __init__(self, image_bytes: int):
+        payload = b"\x89PNG\r\n\x1a\n" + os.urandom(image_bytes)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def send_bytes(self, body: bytes, content_type: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                host, port = self.server.server_address
+                body = json.dumps({"images": [{"url": f"http://{host}:{port}/image.png"}]}).encode("utf-8")
+                self.send_bytes(body, "application/json")
+
+            def do_GET(self) -> None:
+                self.send_bytes(payload, "image/png")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# --- ベンチマーク ------------------------------------------------------------
+# 各ケースは (1回分を実行して処理した件数を返す関数, 単位) を返す
+
+def case_svg_render(ctx: dict):
+    header = ctx["header"]
+    output = os.path.join(ctx["tmp"], "svg-render.svg")
+    # 1回が数msだと計測のぶれが大きいので、タグ10個分まとめて描く
+    combos = [(f"v2.3.{i}", p, c) for i in range(10) for p in header.PATTERNS for c in header.COLORMAPS]
+
+    def run() -> int:
+        for tag, pattern, colormap in combos:
+            header.generate_svg(tag, output, pattern, colormap, 1200, 315)
+        return len(combos)
+    return run, "svg"
+
+
+def case_svg_render_large(ctx: dict):
+    header = ctx["header"]
+    output = os.path.join(ctx["tmp"], "svg-large.svg")
+    seeds = iter(range(1 << 30))
+
+    def run() -> int:
+        # パーティクル配置はシードごとにメモ化されるので、毎回シードを変えて配置から計算させる
+        header.generate_svg("v2.3.4", output, "geometric", "neon", 16000, 5333, particles=5000, seed=next(seeds))
+        return 1
+    return run, "svg"
+
+
+def case_svg_gallery(ctx: dict):
+    header = ctx["header"]
+    entries = [
+        {"tag": tag, "pattern": pattern, "colormap": colormap, "width": 1200, "height": 315}
+        for tag in ctx["tags"][:100] for pattern in header.PATTERNS for colormap in ("neon", "ocean")
+    ]
+
+    def run() -> int:
+        header.render_gallery(entries)
+        return len(entries)
+    return run, "svg"
+
+
+def case_png_local(ctx: dict):
+    header = ctx["header"]
+
+    def run() -> int:
+        # 一番重いパターン（AA の端が多い waves）を 16:9 のフルサイズで描く
+        header.render_local_png_bytes("v2.3.4", "waves", "cat", 1920, 1080)
+        return 1
+    return run, "png"
+
+
+def case_tags_resolve(ctx: dict):
+    header = ctx["header"]
+    tags = ctx["tags"]
+
+    def run() -> int:
+        with contextlib.chdir(ctx["tag_repo"]):
+            resolved = header.resolve_tag_range(f"{tags[0]}..{tags[-1]}")
+        assert len(resolved) == len(tags)
+        return len(resolved)
+    return run, "tag"
+
+
+def case_tags_previous(ctx: dict):
+    import tag_index
+
+    tags = ctx["tags"]
+
+    def run() -> int:
+        # 索引を1回作り、全タグの「1つ前のリリース」を二分探索で引く
+        index = tag_index.TagIndex(tags)
+        for tag in tags:
+            index.previous(tag)
+        return len(tags)
+    return run, "tag"
+
+
+def case_theme_detect(ctx: dict):
+    detect = ctx["header"].detect_theme_from_tag
+    tags = ctx["tags"]
+
+    def run() -> int:
+        for tag in tags:
+            detect(tag)
+        return len(tags)
+    return run, "tag"
+
+
+def case_diff_digest(ctx: dict):
+    import diff_digest
+
+    path = os.path.join(ctx["tmp"], "diff")
+    files = build_diff_repo(path, 300, 1000)
+
+    def run() -> int:
+        digest = diff_digest.build_digest("v1..v2", cwd=path)
+        assert len(digest.encode("utf-8")) <= diff_digest.DEFAULT_MAX_BYTES
+        return files
+    return run, "file"
+
+
+def case_prompt_build(ctx: dict):
+    header = ctx["header"]
+    tags = ctx["tags"]
+    themes = list(header.PROMPT_TEMPLATES)
+
+    def run() -> int:
+        for tag in tags:
+            for theme in themes:
+                header.build_prompt(tag, theme)
+        return len(tags) * len(themes)
+    return run, "prompt"
+
+
+def case_issue_parse_huge(ctx: dict):
+    tokenize = ctx["merge_agent"].tokenize_issue_body
+    line = "2024-01-01T00:00:00Z [build] step 42/97: compiling module with flags -O2 -Wall\n"
+    log = "```\n" + line * (8 * 1024 * 1024 // len(line)) + "```\n"
+    body = (
+        "下記のキャラクターを演じて\nキャラクター: implementer\n\n"
+        f"下記のタスクを処理\nタスク: ビルドの失敗を直す\n\n{log}\n"
+        "タスク:\n  1. ログを読む\n  2. 原因を特定する\n\nパラメータ:\n- branch: main\n"
+    )
+    megabytes = len(body.encode("utf-8")) / 1024 / 1024
+
+    def run() -> float:
+        parsed = tokenize(body)
+        assert len(parsed["tasks"]) == 2
+        return megabytes
+    return run, "MB"
+
+
+def case_issue_parse_many(ctx: dict):
+    merge_agent = ctx["merge_agent"]
+    bodies = [
+        f"下記のキャラクターを演じて\nキャラクター: reviewer\n\n下記のタスクを処理\n"
+        f"タスク: PR #{i} をレビューして\n  テストも確認する\n\nパラメータ:\n- depth: {i % 5}\n"
+        for i in range(2000)
+    ]
+
+    def run() -> int:
+        # メモ化の効果ではなく解析そのものを測るため、毎回キャッシュを空にする
+        merge_agent._issue_parse_cache.clear()
+        for body in bodies:
+            merge_agent.parse_issue_body(body)
+        return len(bodies)
+    return run, "issue"
+
+
+def case_claude_md_create(ctx: dict):
+    merge_agent = ctx["merge_agent"]
+    agents = [path.read_text(encoding="utf-8") for path in sorted((SCRIPTS_DIR.parent / "agents").glob("*.md"))]
+    tasks = [f"タスク {i}: " + "README の手順を更新する。" * 20 for i in range(500)]
+
+    def run() -> int:
+        for i, task in enumerate(tasks):
+            merge_agent.create_claude_md(agents[i % len(agents)], task)
+        return len(tasks)
+    return run, "file"
+
+
+def case_comments_find(ctx: dict):
+    create_pr = ctx["create_pr"]
+    count = 10000
+    stub = StubCommentPages(build_comments(count, claude_depth=count - 2), create_pr.COMMENT_PAGE_SIZE)
+
+    def run() -> int:
+        comments = create_pr.iter_comments_newest_first(stub.query, ("o", "r"), "1")
+        assert create_pr.find_claude_comment(comments).startswith("done")
+        return count - 1
+    return run, "comment"
+
+
+def case_pr_build(ctx: dict):
+    create_pr = ctx["create_pr"]
+    summary = "\n\n\n".join(f"- 変更点 {i}: ファイルを更新しました" for i in range(30))
+    comments = [
+        {"author": {"login": "claude"}, "body": (
+            f"作業が完了しました\n---\n{summary}\n\n"
+            f"[Create PR ➔](https://github.com/o/r/compare/main...claude-glm-dev-issue-{i}"
+            f"?quick_pull=1&title=feat%3A%20%E6%A9%9F%E8%83%BD{i}&body=Closes%20%23{i}%0A%0A" + "%E5%A4%89%E6%9B%B4" * 50 + ")"
+        )}
+        for i in range(1000)
+    ]
+
+    def run() -> int:
+        for i, comment in enumerate(comments):
+            context = {"comments": iter([comment]), "issue_title": f"機能{i}を作って"}
+            title, _ = create_pr.build_pr_content(str(i), context, "commit body", True)
+            assert title.startswith("feat:")
+        return len(comments)
+    return run, "PR"
+
+
+def case_fal_batch(ctx: dict):
+    header = ctx["header"]
+    stub = ctx.setdefault("fal", StubFal(image_bytes=512 * 1024))
+    output_dir = Path(ctx["tmp"]) / "fal"
+    jobs = [
+        {
+            "prompt": header.build_prompt(f"v1.{i}.0", "feature"),
+            "aspect_ratio": "16:9",
+            "output": str(output_dir / f"header-{i}.png"),
+            "cache_key": f"bench-{i}",
+        }
+        for i in range(32)
+    ]
+
+    def run() -> int:
+        results = asyncio.run(header.generate_png_batch(jobs, "bench-key", concurrency=8, endpoint=stub.endpoint))
+        assert all(result["ok"] for result in results), results
+        return len(jobs)
+    return run, "image"
+
+
+CASES = {
+    "svg.render": case_svg_render,
+    "svg.render_large": case_svg_render_large,
+    "svg.gallery": case_svg_gallery,
+    "png.local": case_png_local,
+    "tags.resolve": case_tags_resolve,
+    "tags.previous": case_tags_previous,
+    "theme.detect": case_theme_detect,
+    "diff.digest": case_diff_digest,
+    "prompt.build": case_prompt_build,
+    "issue.parse_huge": case_issue_parse_huge,
+    "issue.parse_many": case_issue_parse_many,
+    "claude_md.create": case_claude_md_create,
+    "comments.find": case_comments_find,
+    "pr.build": case_pr_build,
+    "fal.batch": case_fal_batch,
+}
+
+
+def measure(run, runs: int) -> dict:
+    """ウォームアップ1回のあと runs 回計測し、別の1回で tracemalloc のピークを取る"""
+    run()
+    times = []
+    items = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        items = run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # スループットは一番速かった回から出す（他の負荷によるぶれを受けにくい）
+    return {
+        "ms": statistics.median(times) * 1000,
+        "throughput": items / min(times),
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def compare(name: str, result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """ベースラインからの後退を文字列のリストで返す"""
+    regressions = []
+    if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+        regressions.append(
+            f"{name}: throughput {result['throughput']:.1f} {result['unit']}/s "
+            f"< baseline {baseline['throughput']:.1f} (-{(1 - result['throughput'] / baseline['throughput']) * 100:.0f}%)"
+        )
+    if result["peak_mb"] > baseline["peak_mb"] * (1 + tolerance) + MEMORY_SLACK_MB:
+        regressions.append(
+            f"{name}: peak memory {result['peak_mb']:.1f} MB > baseline {baseline['peak_mb']:.1f} MB"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="スクリプトのホットな関数のベンチマークスイート")
+    parser.add_argument("--only", type=str, default=None, help="実行するベンチマーク名の前方一致（カンマ区切り）")
+    parser.add_argument("--tags", type=int, default=3000, help="代役リポジトリのタグ数")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数")
+    parser.add_argument("--baseline", type=str, default=str(DEFAULT_BASELINE), help="ベースラインのJSONファイル")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="許容する後退の割合（0.5 = 50%%）")
+    parser.add_argument("--update-baseline", action="store_true", help="今回の結果でベースラインを書き換える")
+    parser.add_argument("--json", type=str, default=None, help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+
+    prefixes = [item.strip() for item in args.only.split(",")] if args.only else [""]
+    selected = [name for name in CASES if any(name.startswith(prefix) for prefix in prefixes)]
+    if not selected:
+        parser.error(f"no benchmark matches --only {args.only} (available: {', '.join(CASES)})")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        # 各スクリプトの [DEBUG] 出力や猫メッセージは捨てる
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            ctx = {
+                "tmp": tmp,
+                "header": load_script("generate-header.py", "generate_header"),
+                "merge_agent": load_script("merge-agent.py", "merge_agent"),
+                "create_pr": load_script("create-pr.py", "create_pr"),
+                "tag_repo": os.path.join(tmp, "tags"),
+            }
+            ctx["tags"] = build_tag_repo(ctx["tag_repo"], args.tags)
+
+        try:
+            for name in selected:
+                with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+                    run, unit = CASES[name](ctx)
+                    result = measure(run, args.runs)
+                results[name] = {"unit": unit, **result}
+                print(f"{name:18}: {result['throughput']:12.1f} {unit + '/s':10} "
+                      f"{result['ms']:9.2f} ms/run  peak={result['peak_mb']:7.2f} MB")
+        finally:
+            if "fal" in ctx:
+                ctx["fal"].close()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"args": vars(args), "results": results}, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        cases = {}
+        if baseline_path.is_file():
+            cases = json.loads(baseline_path.read_text(encoding="utf-8")).get("cases", {})
+        cases.update({
+            name: {key: round(value, 3) if isinstance(value, float) else value for key, value in result.items()}
+            for name, result in results.items()
+        })
+        baseline_path.write_text(json.dumps({
+            "python": sys.version.split()[0],
+            "tags": args.tags,
+            "cases": dict(sorted(cases.items())),
+        }, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"baseline updated: {baseline_path}")
+        return 0
+
+    if not baseline_path.is_file():
+        print(f"no baseline at {baseline_path}; run with --update-baseline to create one")
+        return 0
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("tags") != args.tags:
+        print(f"[ERROR] baseline was recorded with --tags {baseline.get('tags')}", file=sys.stderr)
+        return 1
+
+    regressions = []
+    for name, result in results.items():
+        if name in baseline["cases"]:
+            regressions += compare(name, result, baseline["cases"][name], args.tolerance)
+    for regression in regressions:
+        print(f"[ERROR] {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
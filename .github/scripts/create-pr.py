@@ -6,58 +6,217 @@ import os
 import re
 import subprocess
 import sys
+import threading
+import time
 import urllib.parse
 
+# 共有モジュール（ワークフローは create-pr.py と同じ場所にダウンロードする）
+from git_stream import git_log_records
+from github_client import GitHubClient, GitHubError, detect_repository, run_command
+from pipeline_trace import sample_payload, span
 
-def run_command(cmd: list[str]) -> str:
-    """Run command and return output."""
-    result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-    return result.stdout.strip()
+COMMENT_PAGE_SIZE = 100
 
+# PRの有無・Issueタイトル・最新コメントのページを1回のGraphQLクエリで取得する
+# (gh pr list --head と同じく、オープンなPRだけを「既存」とみなす)
+PR_CONTEXT_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $head: String!, $pageSize: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(headRefName: $head, states: [OPEN], first: 1) { totalCount }
+    issue(number: $number) {
+      title
+      comments(last: $pageSize) {
+        pageInfo { hasPreviousPage startCursor }
+        nodes { author { login } body }
+      }
+    }
+  }
+}
+"""
 
-def main():
-    branch_name = sys.argv[1]
-    issue_number = sys.argv[2]
+# PRの有無が分かっているとき（--bulk でオープンなPRを一覧済み）は、Issueの部分だけ取得する
+ISSUE_CONTEXT_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $pageSize: Int!) {
+  repository(owner: $owner, name: $name) {
+    issue(number: $number) {
+      title
+      comments(last: $pageSize) {
+        pageInfo { hasPreviousPage startCursor }
+        nodes { author { login } body }
+      }
+    }
+  }
+}
+"""
 
-    # オプション: タスクサマリーを含めるかどうか（デフォルトはtrue）
-    include_task_summary = os.getenv("INCLUDE_TASK_SUMMARY", "true").lower() == "true"
+# それより古いコメントは新しい順にページングして取得する
+COMMENTS_PAGE_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $pageSize: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    issue(number: $number) {
+      comments(last: $pageSize, before: $cursor) {
+        pageInfo { hasPreviousPage startCursor }
+        nodes { author { login } body }
+      }
+    }
+  }
+}
+"""
 
-    print(f"[DEBUG] Branch name: {branch_name}", file=sys.stderr)
-    print(f"[DEBUG] Issue number: {issue_number}", file=sys.stderr)
-    print(f"[DEBUG] Include task summary: {include_task_summary}", file=sys.stderr)
 
-    # Check if PR already exists
-    pr_list_output = run_command([
-        "gh", "pr", "list",
-        "--head", branch_name,
-        "--json", "number",
-        "--jq", ". | length > 0"
-    ])
-    if pr_list_output == "true":
-        print(f"PR already exists for branch {branch_name}, skipping...")
-        return
-
-    # Get commit message from branch (get all commits, separated by null char)
-    commits = run_command([
-        "git", "log", f"origin/main..{branch_name}",
-        "--pretty=format:%B%x00", "--reverse"
-    ])
-    # Get first commit (split by null character)
-    commit_body = commits.split("\x00")[0].strip() if commits else ""
-    print(f"[DEBUG] Commit body:\n{commit_body}", file=sys.stderr)
+FETCH_ERRORS = (GitHubError, OSError, ValueError, KeyError, TypeError)
 
-    # Get Claude's latest comment
-    issue_data = run_command([
+
+def fetch_pr_context(run_query, repository: tuple[str, str], branch_name: str, issue_number: str,
+                     pr_exists: bool | None = None) -> dict:
+    """Fetch PR existence, issue title and the newest comment page in one GraphQL round trip.
+
+    When pr_exists is already known, only the issue part is queried.
+    """
+    owner, name = repository
+    variables = {"owner": owner, "name": name, "number": int(issue_number), "pageSize": COMMENT_PAGE_SIZE}
+    if pr_exists is None:
+        data = run_query(PR_CONTEXT_QUERY, {**variables, "head": branch_name})
+    else:
+        data = run_query(ISSUE_CONTEXT_QUERY, variables)
+    repo = data["repository"]
+    issue = repo.get("issue") or {}
+    return {
+        "pr_exists": repo["pullRequests"]["totalCount"] > 0 if pr_exists is None else pr_exists,
+        "issue_title": issue.get("title", ""),
+        "comments_page": issue.get("comments") or {},
+    }
+
+
+def iter_comments_newest_first(run_query, repository: tuple[str, str], issue_number: str,
+                               first_page: dict | None = None, page_size: int = COMMENT_PAGE_SIZE):
+    """Yield issue comments from newest to oldest, fetching one page at a time.
+
+    Only the current page is held in memory, and no further pages are requested
+    once the caller stops iterating.
+    """
+    owner, name = repository
+    page = first_page
+    cursor = None
+    while True:
+        if page is None:
+            data = run_query(COMMENTS_PAGE_QUERY, {
+                "owner": owner, "name": name, "number": int(issue_number),
+                "pageSize": page_size, "cursor": cursor,
+            })
+            page = ((data["repository"] or {}).get("issue") or {}).get("comments") or {}
+        for node in reversed(page.get("nodes") or []):
+            yield {"author": node.get("author") or {}, "body": node.get("body", "")}
+        page_info = page.get("pageInfo") or {}
+        if not page_info.get("hasPreviousPage"):
+            return
+        cursor = page_info.get("startCursor")
+        page = None
+
+
+def fetch_pr_context_with_gh(branch_name: str, issue_number: str, repository: tuple[str, str] | None,
+                             pr_exists: bool | None = None) -> dict:
+    """Fallback: fetch the same context through gh subprocesses."""
+    if pr_exists is None:
+        pr_exists = run_command([
+            "gh", "pr", "list",
+            "--head", branch_name,
+            "--json", "number",
+            "--jq", ". | length > 0"
+        ]) == "true"
+    if pr_exists:
+        return {"pr_exists": True, "issue_title": None, "comments": iter(())}
+
+    if repository:
+        # トークンなしのクライアントは gh api graphql 経由で問い合わせる
+        comments = iter_comments_newest_first(GitHubClient(token="", use_cache=False).graphql, repository, issue_number)
+    else:
+        # Without the repository name only the full comment list is available
+        issue_data = run_command([
+            "gh", "issue", "view", issue_number,
+            "--json", "comments", "--jq", ".comments"
+        ])
+        comments = reversed(json.loads(issue_data) if issue_data else [])
+    return {
+        "pr_exists": False,
+        # The title is fetched lazily, only when the Create PR link is missing
+        "issue_title": None,
+        "comments": comments,
+    }
+
+
+def load_pr_context(branch_name: str, issue_number: str, client=None, pr_exists: bool | None = None) -> dict:
+    """Fetch PR/issue data via GraphQL, falling back to gh when it is unavailable.
+
+    `client` comes from graphql_client() and stays owned by the caller: the
+    `comments` iterator in the result pages lazily through it, so close the
+    client only after the comments have been consumed. Pass pr_exists when it
+    is already known to skip the per-branch PR lookup.
+    """
+    repository = detect_repository()
+    if client and repository:
+        run_query = client.graphql
+        try:
+            with span("pr.context", branch=branch_name, issue=issue_number):
+                context = fetch_pr_context(run_query, repository, branch_name, issue_number, pr_exists)
+            print("[DEBUG] Fetched PR context via GraphQL", file=sys.stderr)
+            context["comments"] = iter_comments_newest_first(
+                run_query, repository, issue_number, first_page=context.pop("comments_page")
+            )
+            return context
+        except FETCH_ERRORS as e:
+            print(f"[DEBUG] GraphQL fetch failed, falling back to gh: {e}", file=sys.stderr)
+    return fetch_pr_context_with_gh(branch_name, issue_number, repository, pr_exists)
+
+
+def graphql_client():
+    """Return a GitHubClient that worker threads can share (connections are kept per thread).
+
+    Returns None when there is no way to authenticate.
+    """
+    client = GitHubClient()
+    return client if client.transport != "anonymous" else None
+
+
+def fetch_issue_title(issue_number: str) -> str:
+    """Fetch the issue title, through the shared response cache when available."""
+    try:
+        with GitHubClient() as client:
+            return client.issue(issue_number).get("title", "")
+    except FETCH_ERRORS as e:
+        print(f"[DEBUG] Cached issue lookup failed, falling back to gh: {e}", file=sys.stderr)
+    return run_command([
         "gh", "issue", "view", issue_number,
-        "--json", "comments", "--jq", ".comments"
+        "--json", "title", "--jq", ".title"
     ])
-    comments = json.loads(issue_data) if issue_data else []
-    claude_comment = ""
-    for comment in reversed(comments):
-        # Claude bot's login is "claude" (not "claude[bot]")
-        if comment.get("author", {}).get("login") == "claude":
-            claude_comment = comment.get("body", "")
-            break
+
+
+def find_claude_comment(comments_newest_first) -> str:
+    """Return the body of the latest comment by Claude, stopping at the first match."""
+    with span("pr.find_comment") as s:
+        scanned = 0
+        try:
+            for comment in comments_newest_first:
+                scanned += 1
+                # Claude bot's login is "claude" (not "claude[bot]")
+                if comment.get("author", {}).get("login") == "claude":
+                    s.set(scanned=scanned, found=True)
+                    return comment.get("body", "")
+        except FETCH_ERRORS as e:
+            print(f"[DEBUG] Failed to page through comments: {e}", file=sys.stderr)
+        s.set(scanned=scanned, found=False)
+    return ""
+
+
+def start_git_log(branch_name: str):
+    """Start streaming commit messages (oldest first) so git runs while GitHub data is fetched."""
+    return git_log_records(f"origin/main..{branch_name}", reverse=True)
+
+
+def build_pr_content(issue_number: str, context: dict, commit_body: str, include_task_summary: bool) -> tuple[str, str]:
+    """Build the PR title and body from Claude's latest comment, falling back to the issue title and commit."""
+    # Get Claude's latest comment
+    claude_comment = find_claude_comment(context["comments"])
     print(f"[DEBUG] Claude comment (first 200 chars): {claude_comment[:200] if claude_comment else '(empty)'}...", file=sys.stderr)
 
     # タスクサマリー（---より後ろの部分）を抽出
@@ -87,10 +246,9 @@ def main():
         pr_body = urllib.parse.unquote(params.get("body", [""])[0])
     else:
         # Fallback: use issue title and commit message
-        issue_title = run_command([
-            "gh", "issue", "view", issue_number,
-            "--json", "title", "--jq", ".title"
-        ])
+        issue_title = context["issue_title"]
+        if issue_title is None:
+            issue_title = fetch_issue_title(issue_number)
 
         # Determine prefix based on issue title
         if any(word in issue_title for word in ["を作って", "を作成", "を追加"]):
@@ -138,17 +296,286 @@ def main():
 
     print(f"[DEBUG] PR title: {pr_title}", file=sys.stderr)
     print(f"[DEBUG] Task summary: {'included' if task_summary else '(empty)'}", file=sys.stderr)
-    print(f"[DEBUG] PR body:\n{final_body}", file=sys.stderr)
+    print(f"[DEBUG] PR body: {sample_payload(final_body)}", file=sys.stderr)
     print(f"[DEBUG] PR body length: {len(final_body)}", file=sys.stderr)
 
-    # Create PR
-    subprocess.run([
-        "gh", "pr", "create",
-        "--base", "main",
-        "--head", branch_name,
-        "--title", pr_title,
-        "--body", final_body,
+    return pr_title, final_body
+
+
+AGENT_BRANCH_PREFIX = "claude-glm-dev-issue-"
+BULK_CREATE_INTERVAL = 1.0
+BULK_RATE_LIMIT_DELAY = 60.0
+BULK_CREATE_ATTEMPTS = 3
+
+# オープンなPRのブランチ名を一覧する（1ページ100件、通常は1回で済む）
+OPEN_PR_HEADS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: [OPEN], first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { headRefName }
+    }
+  }
+}
+"""
+
+
+def list_agent_branches(prefix: str = AGENT_BRANCH_PREFIX) -> list[tuple[str, str]]:
+    """Return (branch, issue_number) for every origin branch named <prefix><number>."""
+    output = run_command([
+        "git", "for-each-ref", "--format=%(refname:lstrip=3)", f"refs/remotes/origin/{prefix}*"
+    ])
+    branches = []
+    for branch in output.splitlines():
+        issue_number = branch[len(prefix):]
+        if branch.startswith(prefix) and issue_number.isdigit():
+            branches.append((branch, issue_number))
+    return sorted(branches, key=lambda item: int(item[1]))
+
+
+def list_open_pr_heads(client=None) -> set[str]:
+    """Return the head branch names of all open PRs with one listing call (paged past 100 PRs)."""
+    repository = detect_repository()
+    if client and repository:
+        run_query = client.graphql
+        owner, name = repository
+        heads = set()
+        cursor = None
+        try:
+            while True:
+                with span("pr.list_open", cursor=cursor):
+                    data = run_query(OPEN_PR_HEADS_QUERY, {"owner": owner, "name": name, "cursor": cursor})
+                pull_requests = data["repository"]["pullRequests"]
+                heads.update(node["headRefName"] for node in pull_requests["nodes"])
+                if not pull_requests["pageInfo"]["hasNextPage"]:
+                    return heads
+                cursor = pull_requests["pageInfo"]["endCursor"]
+        except FETCH_ERRORS as e:
+            print(f"[DEBUG] GraphQL PR listing failed, falling back to gh: {e}", file=sys.stderr)
+    output = run_command([
+        "gh", "pr", "list", "--state", "open", "--limit", "1000",
+        "--json", "headRefName", "--jq", ".[].headRefName"
     ])
+    return set(output.splitlines())
+
+
+class PullRequestError(RuntimeError):
+    """Raised when `gh pr create` fails."""
+
+
+class RateLimiter:
+    """Space out write requests across threads and pause everyone after a rate-limit reply."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def back_off(self, seconds: float) -> None:
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+def plan_branch(branch_name: str, issue_number: str, include_task_summary: bool, client=None,
+                open_heads: set[str] | None = None) -> dict:
+    """Fetch what is needed for one branch and decide whether to create its PR.
+
+    open_heads is the result of list_open_pr_heads(); with it, PR existence is
+    taken from the listing and only the issue title and comments are fetched.
+    """
+    if open_heads is not None and branch_name in open_heads:
+        return {"action": "exists"}
+    git_log = git_log_records(f"origin/main..origin/{branch_name}", reverse=True)
+    try:
+        context = load_pr_context(branch_name, issue_number, client, None if open_heads is None else False)
+        if context["pr_exists"]:
+            return {"action": "exists"}
+        with span("git.first_commit", branch=branch_name):
+            commit_body = next(git_log, "").strip()
+    finally:
+        git_log.close()
+    if not commit_body:
+        return {"action": "skip", "reason": "no commits ahead of main"}
+    title, body = build_pr_content(issue_number, context, commit_body, include_task_summary)
+    return {"action": "create", "title": title, "body": body}
+
+
+def create_pull_request(branch_name: str, title: str, body: str, limiter: RateLimiter) -> str:
+    """Run `gh pr create`, retrying with a shared back-off when GitHub reports a rate limit. Returns the PR URL."""
+    for attempt in range(BULK_CREATE_ATTEMPTS):
+        limiter.wait()
+        with span("gh.pr_create", branch=branch_name, attempt=attempt, body_chars=len(body)) as s:
+            result = subprocess.run([
+                "gh", "pr", "create",
+                "--base", "main",
+                "--head", branch_name,
+                "--title", title,
+                "--body", body,
+            ], capture_output=True, text=True, check=False)
+            s.set(returncode=result.returncode)
+        if result.returncode == 0:
+            return result.stdout.strip()
+        error = result.stderr.strip()
+        if "rate limit" not in error.lower() or attempt == BULK_CREATE_ATTEMPTS - 1:
+            raise PullRequestError(error or f"gh pr create exited with {result.returncode}")
+        # 二次レート制限は全ワーカーで共有して待つ
+        delay = BULK_RATE_LIMIT_DELAY * (2 ** attempt)
+        print(f"[INFO] Rate limited while creating PR for {branch_name}, waiting {delay:g}s", file=sys.stderr)
+        limiter.back_off(delay)
+    raise AssertionError("unreachable")
+
+
+def bulk_main(argv: list[str]) -> int:
+    """Create PRs for every pending agent branch; return 1 if any branch failed."""
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor
+
+    parser = argparse.ArgumentParser(
+        prog="create-pr.py --bulk",
+        description="Create PRs for all claude-glm-dev-issue-* branches that do not have an open PR yet."
+    )
+    parser.add_argument("--prefix", default=AGENT_BRANCH_PREFIX, help="branch name prefix followed by the issue number")
+    parser.add_argument("--workers", type=int, default=4, help="branches processed concurrently")
+    parser.add_argument("--interval", type=float, default=BULK_CREATE_INTERVAL,
+                        help="minimum seconds between PR creations")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without creating PRs")
+    args = parser.parse_args(argv)
+
+    include_task_summary = os.getenv("INCLUDE_TASK_SUMMARY", "true").lower() == "true"
+    start = time.perf_counter()
+
+    branches = list_agent_branches(args.prefix)
+    # 全ブランチで1つのクライアントを共有し、ワーカーごとの接続を使い回す
+    client = graphql_client() if branches else None
+    plans = {}
+    failures = {}
+    try:
+        open_heads = list_open_pr_heads(client) if branches else set()
+        issues = dict(branches)
+        pending = [(branch, issue) for branch, issue in branches if branch not in open_heads]
+        print(f"[INFO] Found {len(branches)} agent branches, {len(branches) - len(pending)} with open PRs",
+              file=sys.stderr)
+
+        plans.update(
+            (branch, {"issue": issue, "action": "exists"}) for branch, issue in branches if branch in open_heads
+        )
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = {
+                branch: pool.submit(plan_branch, branch, issue, include_task_summary, client, open_heads)
+                for branch, issue in pending
+            }
+            for branch, future in futures.items():
+                try:
+                    plans[branch] = {"issue": issues[branch], **future.result()}
+                except FETCH_ERRORS as e:
+                    failures[branch] = str(e)
+                except Exception as e:
+                    # 予期しない例外でも他のブランチは続け、そのブランチの失敗として残す
+                    failures[branch] = f"{type(e).__name__}: {e}"
+    finally:
+        # 計画を作り終えたらコメントの取得も終わっているので、ここで閉じる
+        if client:
+            client.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        to_create = [branch for branch, _ in pending if plans.get(branch, {}).get("action") == "create"]
+        if not args.dry_run:
+            limiter = RateLimiter(args.interval)
+            created = {
+                branch: pool.submit(
+                    create_pull_request, branch, plans[branch]["title"], plans[branch]["body"], limiter
+                )
+                for branch in to_create
+            }
+            for branch, future in created.items():
+                try:
+                    plans[branch]["url"] = future.result()
+                    print(f"[SUCCESS] Created PR for {branch}: {plans[branch]['url']}", file=sys.stderr)
+                except PullRequestError as e:
+                    failures[branch] = str(e)
+                except Exception as e:
+                    failures[branch] = f"{type(e).__name__}: {e}"
+
+    # 計画をブランチ順に表示する
+    for branch, issue in branches:
+        plan = plans.get(branch)
+        if branch in failures:
+            print(f"failed  {branch}  #{issue}  {failures[branch]}")
+        elif plan["action"] == "create":
+            print(f"{'create' if args.dry_run else 'created':7} {branch}  #{issue}  {plan['title']}  "
+                  f"({len(plan['body'])} chars){'  ' + plan['url'] if plan.get('url') else ''}")
+        elif plan["action"] == "skip":
+            print(f"skip    {branch}  #{issue}  {plan['reason']}")
+        else:
+            print(f"exists  {branch}  #{issue}")
+
+    counts = {}
+    for branch, _ in branches:
+        action = "failed" if branch in failures else plans[branch]["action"]
+        if action == "create" and not args.dry_run:
+            action = "created"
+        counts[action] = counts.get(action, 0) + 1
+    summary = ", ".join(f"{count} {action}" for action, count in sorted(counts.items())) or "nothing to do"
+    print(f"[INFO] Bulk{' (dry run)' if args.dry_run else ''}: {summary} in {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--bulk":
+        sys.exit(bulk_main(sys.argv[2:]))
+
+    branch_name = sys.argv[1]
+    issue_number = sys.argv[2]
+
+    # オプション: タスクサマリーを含めるかどうか（デフォルトはtrue）
+    include_task_summary = os.getenv("INCLUDE_TASK_SUMMARY", "true").lower() == "true"
+
+    print(f"[DEBUG] Branch name: {branch_name}", file=sys.stderr)
+    print(f"[DEBUG] Issue number: {issue_number}", file=sys.stderr)
+    print(f"[DEBUG] Include task summary: {include_task_summary}", file=sys.stderr)
+
+    # Read commit messages (git log) while PR/issue data is fetched from GitHub
+    git_log = start_git_log(branch_name)
+    client = graphql_client()
+    try:
+        context = load_pr_context(branch_name, issue_number, client)
+
+        # Check if PR already exists
+        if context["pr_exists"]:
+            git_log.close()
+            print(f"PR already exists for branch {branch_name}, skipping...")
+            return
+
+        # Get first commit message from branch (stop reading after the first NUL-delimited record)
+        with span("git.first_commit", branch=branch_name):
+            commit_body = next(git_log, "").strip()
+            git_log.close()
+        print(f"[DEBUG] Commit body: {sample_payload(commit_body)}", file=sys.stderr)
+
+        # find_claude_comment() がコメントのイテレータを読み終えるまでクライアントは閉じない
+        pr_title, final_body = build_pr_content(issue_number, context, commit_body, include_task_summary)
+    finally:
+        if client:
+            client.close()
+
+    # Create PR
+    with span("gh.pr_create", branch=branch_name, body_chars=len(final_body)):
+        subprocess.run([
+            "gh", "pr", "create",
+            "--base", "main",
+            "--head", branch_name,
+            "--title", pr_title,
+            "--body", final_body,
+        ])
 
 
 if __name__ == "__main__":
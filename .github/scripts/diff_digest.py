@@ -0,0 +1,463 @@
+"""Budgeted digest of a `git diff` for the release-notes pipeline.
+
+A release diff can be hundreds of MB, far more than a runner log or a model
+prompt can take. This module reads it in two streaming passes and writes a
+Markdown digest that never exceeds a byte (or token) budget:
+
+1. `git diff --numstat -z` gives the added/deleted line counts of every file.
+   Files are classified (source, test, config, docs, generated, lockfile,
+   binary) and rolled up per directory.
+2. The budget left after the summary tables is shared among the files by
+   priority: source first, then tests, config and docs. Generated assets,
+   lockfiles and binaries are only listed with their stats. The selected files
+   are diffed in batches by parallel `git diff` processes whose output is
+   parsed hunk by hunk as it arrives; a batch stops git as soon as all of its
+   files have used up their share.
+
+    with open("/tmp/diff.txt", "w") as out:
+        out.write(build_digest("v1.0.0..v1.1.0", max_bytes=100_000))
+
+This module is shared by the scripts in .github/scripts and is also run by
+auto-release-notes.yml:
+
+    python3 .github/scripts/diff_digest.py v1.0.0..v1.1.0 --max-bytes 100000 --output /tmp/diff.txt
+    python3 .github/scripts/diff_digest.py v1.0.0..v1.1.0 --max-tokens 20000
+"""
+
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from git_stream import RecordStream
+
+DEFAULT_MAX_BYTES = 100_000
+# トークン数からバイト数への換算（英語とコードでおおよそ1トークン4バイト）
+BYTES_PER_TOKEN = 4
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+# 1つの git diff に渡すパスの上限（コマンドラインの長さを抑える）
+BATCH_FILES = 200
+DEFAULT_DEPTH = 2
+# 要約の表に使える予算の割合（残りを差分の抜粋に回す）
+TABLE_SHARE = 0.3
+# これより小さい割り当てしか残らないファイルは抜粋しない
+MIN_EXCERPT_BYTES = 300
+# 割り当てを見積もるときの差分1行あたりのバイト数
+ESTIMATED_LINE_BYTES = 60
+
+# 小さいほど先に予算をもらう。EXCERPT_PRIORITY_LIMIT 以上は統計だけ
+CATEGORY_PRIORITY = {
+    "source": 0,
+    "test": 1,
+    "config": 2,
+    "docs": 3,
+    "other": 4,
+    "generated": 5,
+    "lockfile": 6,
+    "binary": 7,
+}
+EXCERPT_PRIORITY_LIMIT = CATEGORY_PRIORITY["generated"]
+
+LOCKFILE_NAMES = frozenset({
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb",
+    "poetry.lock", "Pipfile.lock", "uv.lock", "pdm.lock", "Cargo.lock", "Gemfile.lock",
+    "composer.lock", "go.sum", "mix.lock", "pubspec.lock", "Podfile.lock", "packages.lock.json",
+})
+GENERATED_DIRS = frozenset({
+    "dist", "build", "vendor", "node_modules", "__pycache__", ".venv", "site-packages", "release-headers",
+})
+GENERATED_SUFFIXES = (
+    ".min.js", ".min.css", ".map", ".svg", ".snap", ".pb.go", "_pb2.py",
+)
+DOCS_SUFFIXES = (".md", ".rst", ".txt", ".adoc")
+CONFIG_SUFFIXES = (".yml", ".yaml", ".toml", ".json", ".ini", ".cfg", ".conf", ".env")
+CONFIG_NAMES = frozenset({"Dockerfile", "Makefile", ".gitignore", ".gitattributes", ".editorconfig"})
+
+
+def classify_path(path: str) -> str:
+    """Category of a changed file, decided from its path alone."""
+    directory, _, name = path.rpartition("/")
+    if name in LOCKFILE_NAMES or name.endswith(".lock"):
+        return "lockfile"
+    parts = directory.split("/") if directory else []
+    if name.endswith(GENERATED_SUFFIXES) or GENERATED_DIRS.intersection(parts):
+        return "generated"
+    if (name.startswith("test_") or name.endswith(("_test.py", "_test.go"))
+            or ".test." in name or ".spec." in name or "tests" in parts or "test" in parts):
+        return "test"
+    if name.endswith(DOCS_SUFFIXES) or "docs" in parts:
+        return "docs"
+    if name.endswith(CONFIG_SUFFIXES) or name in CONFIG_NAMES:
+        return "config"
+    return "source" if "." in name else "other"
+
+
+def directory_of(path: str, depth: int = DEFAULT_DEPTH) -> str:
+    """The first `depth` directories of a path ("." for files at the root)."""
+    parts = path.split("/")[:-1]
+    return "/".join(parts[:depth]) or "."
+
+
+@dataclass
+class FileStat:
+    """One changed file: numstat counts, category and its diff excerpt once read."""
+
+    path: str
+    added: int
+    deleted: int
+    binary: bool = False
+    old_path: str | None = None
+    category: str = ""
+    allowance: int = 0
+    hunks: int = 0
+    complete: bool = False
+    truncated: bool = False
+    excerpt: list[str] = field(default_factory=list)
+
+    @property
+    def changes(self) -> int:
+        return self.added + self.deleted
+
+    @property
+    def priority(self) -> int:
+        return CATEGORY_PRIORITY[self.category]
+
+    @property
+    def expected_bytes(self) -> int:
+        """Estimated size of the full excerpt, from the numstat counts."""
+        return excerpt_overhead(self) + self.changes * ESTIMATED_LINE_BYTES
+
+    @property
+    def label(self) -> str:
+        return f"{self.old_path} → {self.path}" if self.old_path else self.path
+
+
+def git_diff_args(rev_range: str, *args: str) -> list[str]:
+    # パスはエスケープせず、外部 diff や色設定の影響も受けないようにする
+    return ["git", "-c", "core.quotePath=false", "--literal-pathspecs", "diff", "--no-color", "--no-ext-diff",
+            "-M", rev_range, *args]
+
+
+def repo_toplevel(cwd: str | None = None) -> str:
+    """Root of the work tree containing `cwd` (numstat paths and pathspecs are resolved from there)."""
+    result = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True,
+                            check=False, cwd=cwd)
+    if result.returncode:
+        raise ValueError(f"not a git work tree: {os.path.abspath(cwd or '.')}")
+    return result.stdout.strip()
+
+
+def read_numstat(rev_range: str, cwd: str | None = None) -> list[FileStat]:
+    """Stats of every file changed in `rev_range`, in git's order."""
+    files = []
+    records = RecordStream(git_diff_args(rev_range, "--numstat", "-z"), cwd=cwd)
+    try:
+        for record in records:
+            if not record:
+                continue
+            added, deleted, path = record.split("\t", 2)
+            old_path = None
+            if not path:
+                # リネームは「追加\t削除\t」のあとに旧パスと新パスが別のレコードで続く
+                old_path = next(records, "")
+                path = next(records, "")
+            binary = added == "-"
+            files.append(FileStat(
+                path=path,
+                added=0 if binary else int(added),
+                deleted=0 if binary else int(deleted),
+                binary=binary,
+                old_path=old_path,
+                category="binary" if binary else classify_path(path),
+            ))
+    finally:
+        returncode = records.close()
+    if returncode:
+        raise ValueError(f"git diff failed for {rev_range} (exit code {returncode})")
+    return files
+
+
+def rollup(files: list[FileStat], depth: int = DEFAULT_DEPTH) -> dict[str, list[int]]:
+    """Per-directory [files, added, deleted], largest change first."""
+    totals = {}
+    for stat in files:
+        total = totals.setdefault(directory_of(stat.path, depth), [0, 0, 0])
+        total[0] += 1
+        total[1] += stat.added
+        total[2] += stat.deleted
+    return dict(sorted(totals.items(), key=lambda item: (-(item[1][1] + item[1][2]), item[0])))
+
+
+def excerpt_overhead(stat: FileStat) -> int:
+    """Bytes of the heading, fences and "more changed lines" note around an excerpt."""
+    return len(f"\n#### {stat.label} (+{stat.added} −{stat.deleted}, 000000+ hunks)\n\n```diff\n"
+               f"… (0000000000 more changed lines)\n```\n".encode("utf-8"))
+
+
+def allocate(files: list[FileStat], budget: int) -> list[FileStat]:
+    """Share `budget` among the files that may get an excerpt; return the selected ones.
+
+    Categories are served in priority order. Within a category the budget is
+    water-filled: small diffs get what they need (estimated from numstat) and
+    the rest is split evenly among the larger ones. Whatever a category does
+    not use is left for the next one.
+    """
+    selected = []
+    by_priority = {}
+    for stat in files:
+        if stat.priority < EXCERPT_PRIORITY_LIMIT and stat.changes:
+            by_priority.setdefault(stat.priority, []).append(stat)
+
+    for priority in sorted(by_priority):
+        group = sorted(by_priority[priority], key=lambda s: s.changes)
+        for i, stat in enumerate(group):
+            share = budget // (len(group) - i)
+            need = stat.expected_bytes
+            allowance = min(need, share)
+            if allowance < need and allowance < MIN_EXCERPT_BYTES:
+                continue
+            stat.allowance = allowance
+            budget -= allowance
+            selected.append(stat)
+    return selected
+
+
+def split_header(line: str, paths: dict[str, FileStat]) -> FileStat | None:
+    """Find the file of a `diff --git a/<old> b/<new>` line among the expected paths."""
+    rest = line[len("diff --git "):]
+    # パスに " b/" が含まれることもあるので、候補の区切り位置を順に試す
+    start = rest.find(" b/")
+    while start != -1:
+        stat = paths.get(rest[start + 3:])
+        if stat is not None:
+            return stat
+        start = rest.find(" b/", start + 1)
+    return None
+
+
+def read_excerpts(rev_range: str, batch: list[FileStat], cwd: str | None = None) -> None:
+    """Stream the diff of one batch and fill each file's excerpt up to its allowance."""
+    paths = {stat.path: stat for stat in batch}
+    pathspecs = []
+    for stat in batch:
+        # リネームは旧パスも渡さないと追加として扱われる
+        if stat.old_path:
+            pathspecs.append(stat.old_path)
+        pathspecs.append(stat.path)
+    pending = len(batch)
+
+    current = None
+    full = True
+    in_hunk = False
+    used = limit = 0
+    with RecordStream(git_diff_args(rev_range, "--", *pathspecs), separator=b"\n", cwd=cwd) as lines:
+        for line in lines:
+            if line.startswith("diff --git "):
+                # 次の見出しまで読めたので、前のファイルの行数は確定している
+                if current is not None:
+                    current.complete = True
+                    if not full:
+                        pending -= 1
+                if not pending:
+                    break
+                current = split_header(line, paths)
+                full = current is None
+                in_hunk = False
+                if current is not None:
+                    used = 0
+                    limit = current.allowance - excerpt_overhead(current)
+                continue
+            if current is None:
+                continue
+            if line.startswith("@@"):
+                in_hunk = True
+                current.hunks += 1
+            elif not in_hunk:
+                # index・mode・---/+++ の行は見出しに含めるので抜粋しない
+                continue
+            if full:
+                continue
+            size = len(line.encode("utf-8")) + 1
+            if used + size > limit:
+                full = True
+                current.truncated = True
+                pending -= 1
+                if not pending:
+                    break
+                continue
+            current.excerpt.append(line)
+            used += size
+        else:
+            if current is not None:
+                current.complete = True
+
+
+def read_all_excerpts(rev_range: str, files: list[FileStat], jobs: int = DEFAULT_JOBS,
+                      cwd: str | None = None) -> None:
+    """Run read_excerpts() over batches of `files` in parallel git processes.
+
+    Files that will not fit in their allowance get a git process of their own,
+    so it can be stopped as soon as their excerpt is full instead of reading
+    the rest of a large diff to reach the next file of the batch.
+    """
+    if not files:
+        return
+    batches = [[stat] for stat in files if stat.expected_bytes > stat.allowance]
+    whole = [stat for stat in files if stat.expected_bytes <= stat.allowance]
+    # 大きな差分がひとつのバッチに偏らないように、サイズ順に振り分ける
+    whole.sort(key=lambda s: -s.changes)
+    count = min(max(jobs, -(-len(whole) // BATCH_FILES)), len(whole))
+    batches += [whole[i::count] for i in range(count)]
+    if len(batches) == 1:
+        read_excerpts(rev_range, batches[0], cwd)
+        return
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for future in [pool.submit(read_excerpts, rev_range, batch, cwd) for batch in batches]:
+            future.result()
+
+
+def fit_rows(rows: list[str], budget: int, more: str) -> list[str]:
+    """Keep the leading rows that fit in `budget` bytes, ending with a "more" line when cut."""
+    kept = []
+    used = 0
+    for i, row in enumerate(rows):
+        used += len(row.encode("utf-8")) + 1
+        last = i == len(rows) - 1
+        # 最後の行でなければ「ほか N 件」の行が入る余地も残す
+        reserve = 0 if last else len(more.format(len(rows) - i - 1).encode("utf-8")) + 1
+        if used + reserve > budget:
+            kept.append(more.format(len(rows) - i))
+            break
+        kept.append(row)
+    return kept
+
+
+def table_cell(text: str) -> str:
+    return text.replace("|", "\\|")
+
+
+def render_excerpt(stat: FileStat) -> str:
+    hunks = f"{stat.hunks}{'' if stat.complete else '+'} hunk{'' if stat.hunks == 1 else 's'}"
+    lines = [f"\n#### {stat.label} (+{stat.added} −{stat.deleted}, {hunks})\n", "```diff", *stat.excerpt]
+    if stat.truncated:
+        shown = sum(1 for line in stat.excerpt if line[:1] in "+-")
+        lines.append(f"… ({stat.changes - shown} more changed lines)")
+    lines.append("```")
+    return "\n".join(lines) + "\n"
+
+
+def build_digest(
+    rev_range: str,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    max_tokens: int | None = None,
+    depth: int = DEFAULT_DEPTH,
+    jobs: int = DEFAULT_JOBS,
+    cwd: str | None = None,
+) -> str:
+    """Markdown digest of `git diff rev_range`, at most `max_bytes` UTF-8 bytes long.
+
+    `max_tokens`, when given, is turned into bytes with BYTES_PER_TOKEN and
+    the smaller of the two limits wins. `cwd` may be any directory of the
+    work tree; both git passes run from its root.
+    """
+    budget = max_bytes
+    if max_tokens is not None:
+        budget = min(budget, max_tokens * BYTES_PER_TOKEN)
+
+    # numstat のパスはリポジトリのルートからなので、抜粋の pathspec もルートで解決させる
+    cwd = repo_toplevel(cwd)
+    files = read_numstat(rev_range, cwd)
+    added = sum(stat.added for stat in files)
+    deleted = sum(stat.deleted for stat in files)
+    categories = {}
+    for stat in files:
+        categories[stat.category] = categories.get(stat.category, 0) + 1
+    ranked = sorted(files, key=lambda s: (s.priority, -s.changes, s.path))
+
+    breakdown = ", ".join(
+        f"{name} {count}" for name, count in sorted(categories.items(), key=lambda item: CATEGORY_PRIORITY[item[0]])
+    )
+    # 見出しは ### から始め、Issue 本文の「## コード差分」の下にそのまま入れられるようにする
+    summary = [
+        f"**{rev_range}**: {len(files)} files changed, +{added} −{deleted}" + (f" ({breakdown})" if breakdown else ""),
+        "",
+    ]
+
+    table_budget = int(budget * TABLE_SHARE)
+    directory_rows = [
+        f"| {table_cell(name)} | {count} | {plus} | {minus} |"
+        for name, (count, plus, minus) in rollup(files, depth).items()
+    ]
+    directories = ["### Directories", "", "| directory | files | + | − |", "|---|---:|---:|---:|"]
+    directories += fit_rows(directory_rows, table_budget // 3, "| … {} more directories | | | |")
+    file_rows = [
+        f"| {table_cell(stat.label)} | {stat.category} | {'binary' if stat.binary else stat.added} | "
+        f"{'' if stat.binary else stat.deleted} |"
+        for stat in ranked
+    ]
+    file_table = ["", "### Files", "", "| file | category | + | − |", "|---|---|---:|---:|"]
+    file_table += fit_rows(file_rows, table_budget * 2 // 3, "| … {} more files | | | |")
+
+    head = "\n".join(summary + directories + file_table) + "\n"
+    # 抜粋の件数行の分を残しておく
+    footer_reserve = 200
+    excerpt_budget = budget - len(head.encode("utf-8")) - footer_reserve - len("\n### Excerpts\n")
+
+    selected = allocate(ranked, max(excerpt_budget, 0))
+    read_all_excerpts(rev_range, selected, jobs, cwd)
+
+    parts = [head]
+    used = len(head.encode("utf-8"))
+    shown = 0
+    if selected:
+        parts.append("\n### Excerpts\n")
+        used += len(parts[-1].encode("utf-8"))
+        for stat in sorted(selected, key=lambda s: (s.priority, -s.changes, s.path)):
+            if not stat.excerpt:
+                continue
+            text = render_excerpt(stat)
+            size = len(text.encode("utf-8"))
+            if used + size > budget - footer_reserve:
+                continue
+            parts.append(text)
+            used += size
+            shown += 1
+    omitted = len(files) - shown
+    if omitted:
+        parts.append(f"\n_{omitted} of {len(files)} files have no excerpt "
+                     f"(budget {budget} bytes; lockfiles, generated files and binaries are listed only)._\n")
+    return "".join(parts)
+
+
+def main(argv: list[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Budgeted Markdown digest of a git diff")
+    parser.add_argument("rev_range", help="revision range, e.g. v1.0.0..v1.1.0")
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="digest size limit in bytes")
+    parser.add_argument("--max-tokens", type=int, default=None,
+                        help=f"digest size limit in tokens ({BYTES_PER_TOKEN} bytes each)")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="directory depth of the rollup")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="parallel git diff processes")
+    parser.add_argument("--output", default="-", help="output file (- for stdout)")
+    args = parser.parse_args(argv)
+    if args.max_bytes < 1000 or (args.max_tokens is not None and args.max_tokens < 250):
+        parser.error("the budget must be at least 1000 bytes (250 tokens)")
+
+    try:
+        digest = build_digest(args.rev_range, args.max_bytes, args.max_tokens, args.depth, max(args.jobs, 1))
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    if args.output == "-":
+        sys.stdout.write(digest)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(digest)
+        print(f"[INFO] Wrote {len(digest.encode('utf-8'))} byte digest to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
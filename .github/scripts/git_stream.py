@@ -0,0 +1,97 @@
+"""Stream NUL-delimited records from git without buffering the whole output.
+
+`git log` output is read from the pipe chunk by chunk and split on NUL as it
+arrives, so callers that only need the first few records can stop early:
+closing the stream kills git instead of letting it format every commit.
+
+    with git_log_records("origin/main..my-branch", reverse=True) as records:
+        first_body = next(records, "").strip()
+
+This module is shared by the scripts in .github/scripts. Scripts that may be
+downloaded on their own (create-pr.py) import it optionally and keep a
+buffered fallback.
+"""
+
+import subprocess
+from collections.abc import Iterator
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class RecordStream:
+    """Iterate over separator-delimited records read incrementally from a subprocess."""
+
+    def __init__(
+        self,
+        args: list[str],
+        separator: bytes = b"\x00",
+        cwd: str | None = None,
+        encoding: str = "utf-8",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.args = args
+        self.separator = separator
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self.process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=cwd)
+        self._records = self._read_records()
+
+    def _read_records(self) -> Iterator[str]:
+        stdout = self.process.stdout
+        pending = b""
+        while True:
+            chunk = stdout.read1(self.chunk_size)
+            if not chunk:
+                break
+            self.bytes_read += len(chunk)
+            pending += chunk
+            if self.separator not in chunk:
+                continue
+            *records, pending = pending.split(self.separator)
+            for record in records:
+                yield record.decode(self.encoding, errors="replace")
+        if pending:
+            yield pending.decode(self.encoding, errors="replace")
+
+    def __iter__(self) -> "RecordStream":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._records)
+
+    def close(self) -> int | None:
+        """Stop reading; kill the process if it is still producing output. Returns its exit code."""
+        self._records.close()
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.stdout.close()
+        return self.process.wait()
+
+    def __enter__(self) -> "RecordStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def git_log_records(
+    rev_range: str,
+    pretty: str = "%B",
+    reverse: bool = False,
+    extra_args: list[str] | None = None,
+    cwd: str | None = None,
+) -> RecordStream:
+    """Stream `git log -z --format=<pretty>` records for a revision range."""
+    args = ["git", "log", "-z", f"--format={pretty}"]
+    if reverse:
+        args.append("--reverse")
+    args += extra_args or []
+    args.append(rev_range)
+    return RecordStream(args, cwd=cwd)
+
+
+def first_commit_body(rev_range: str, cwd: str | None = None) -> str:
+    """Return the message of the oldest commit in a range, reading only as much output as needed."""
+    with git_log_records(rev_range, reverse=True, cwd=cwd) as records:
+        return next(records, "").strip()
@@ -0,0 +1,323 @@
+"""Shared GitHub and git access for the scripts in .github/scripts.
+
+GitHubClient talks to the REST and GraphQL APIs over pooled keep-alive
+connections (one per thread, so a client can be shared by worker threads)
+when a token (GH_TOKEN / GITHUB_TOKEN) is available. Without a
+token it goes through `gh api`, and without gh it falls back to anonymous
+HTTPS, which still works for public repositories.
+
+REST GET responses are cached on disk, keyed by endpoint, and revalidated
+with If-None-Match. A 304 reply reuses the stored body and does not count
+against the API rate limit, so repeated lookups across scripts and reruns
+stay cheap. Within one process, repeated lookups are served from memory.
+
+    client = GitHubClient()
+    issue = client.issue("42")          # cached REST GET
+    data = client.graphql(QUERY, {...})  # pooled POST, never cached
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import urllib.parse
+from pathlib import Path
+
+from git_stream import RecordStream, first_commit_body, git_log_records  # noqa: F401  (re-exported)
+from pipeline_trace import span
+
+API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", f"{API_URL}/graphql")
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class GitHubError(RuntimeError):
+    """Raised when a GitHub request fails."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+def run_command(cmd: list[str]) -> str:
+    """Run command and return output."""
+    with span("subprocess", cmd=" ".join(cmd[:3])) as s:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        s.set(returncode=result.returncode, stdout_chars=len(result.stdout))
+    return result.stdout.strip()
+
+
+def detect_repository() -> tuple[str, str] | None:
+    """Return (owner, name) from GITHUB_REPOSITORY or the origin remote."""
+    import re
+
+    repository = os.getenv("GITHUB_REPOSITORY", "")
+    if not repository:
+        remote = run_command(["git", "remote", "get-url", "origin"])
+        match = re.search(r'github\.com[:/]([^/]+/[^/]+?)(?:\.git)?$', remote)
+        repository = match.group(1) if match else ""
+    owner, _, name = repository.partition("/")
+    return (owner, name) if owner and name else None
+
+
+def default_cache_dir() -> str:
+    """Cache directory (GITHUB_CLIENT_CACHE_DIR or ~/.cache/github-client)."""
+    if os.getenv("GITHUB_CLIENT_CACHE_DIR"):
+        return os.environ["GITHUB_CLIENT_CACHE_DIR"]
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "github-client")
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of GET responses with their ETags.
+
+    Entries live in `<dir>/<key[:2]>/<key>.json` and their mtime is bumped on
+    every hit; when the total size exceeds the limit the oldest are removed.
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.directory = Path(directory or default_cache_dir())
+        self.max_bytes = max_bytes
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def load(self, key: str) -> dict | None:
+        """Return {"etag": ..., "body": ...} or None."""
+        path = self.path_for(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) and "etag" in entry else None
+
+    def touch(self, key: str) -> None:
+        try:
+            os.utime(self.path_for(key))
+        except OSError:
+            pass
+
+    def store(self, key: str, url: str, etag: str, body: str) -> None:
+        path = self.path_for(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "etag": etag, "body": body}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # キャッシュに書けなくてもリクエスト自体は成功させる
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits the limit."""
+        entries = []
+        total = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class GitHubClient:
+    """GitHub REST/GraphQL client with pooled connections and an ETag response cache."""
+
+    def __init__(
+        self,
+        token: str | None = None,
+        api_url: str = API_URL,
+        graphql_url: str = GRAPHQL_URL,
+        cache: ResponseCache | None = None,
+        use_cache: bool = True,
+        timeout: float = 30.0,
+    ):
+        self.token = token if token is not None else (os.getenv("GH_TOKEN") or os.getenv("GITHUB_TOKEN") or "")
+        self.api_url = api_url.rstrip("/")
+        self.graphql_url = graphql_url
+        self.cache = (cache or ResponseCache()) if use_cache else None
+        self.timeout = timeout
+        self.gh_path = shutil.which("gh")
+        self.stats = {"requests": 0, "not_modified": 0, "memory_hits": 0}
+        self._memo: dict[str, object] = {}
+        # http.client の接続はスレッドをまたいで使えないので、スレッドごとに持つ
+        self._connections: dict[tuple, http.client.HTTPConnection] = {}
+        self._connections_lock = threading.Lock()
+
+    @property
+    def transport(self) -> str:
+        """"http" with a token, "gh" without one, "anonymous" when gh is also missing."""
+        if self.token:
+            return "http"
+        return "gh" if self.gh_path else "anonymous"
+
+    # --- transports -------------------------------------------------------
+
+    def _connection_key(self, url: urllib.parse.SplitResult) -> tuple:
+        return (threading.get_ident(), url.scheme, url.hostname, url.port)
+
+    def _connection(self, url: urllib.parse.SplitResult) -> http.client.HTTPConnection:
+        key = self._connection_key(url)
+        with self._connections_lock:
+            conn = self._connections.get(key)
+            if conn is None:
+                conn_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+                conn = self._connections[key] = conn_class(url.hostname, url.port, timeout=self.timeout)
+        return conn
+
+    def _http(self, method: str, url: str, body: bytes | None = None, headers: dict | None = None) -> tuple[int, dict, bytes]:
+        """Send a request over the pooled connection, reconnecting once if it went stale."""
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        headers = {"User-Agent": "github-client", "Accept": "application/vnd.github+json", **(headers or {})}
+        if self.token:
+            headers["Authorization"] = f"bearer {self.token}"
+        with span("github.http", method=method, path=parts.path) as s:
+            for attempt in range(2):
+                conn = self._connection(parts)
+                try:
+                    conn.request(method, path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    payload = response.read()
+                    s.set(status=response.status, bytes=len(payload), reconnected=bool(attempt))
+                    return response.status, {k.lower(): v for k, v in response.getheaders()}, payload
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    conn.close()
+                    with self._connections_lock:
+                        self._connections.pop(self._connection_key(parts), None)
+                    if attempt:
+                        raise
+        raise AssertionError("unreachable")
+
+    def _gh_api(self, args: list[str], headers: dict | None = None) -> tuple[int, dict, bytes]:
+        """Run `gh api -i` and split its output into status, headers and body."""
+        cmd = [self.gh_path, "api", "-i"]
+        for name, value in (headers or {}).items():
+            cmd += ["-H", f"{name}: {value}"]
+        with span("github.gh_api", endpoint=args[0]) as s:
+            result = subprocess.run(cmd + args, capture_output=True, check=False)
+            s.set(returncode=result.returncode, bytes=len(result.stdout))
+        output = result.stdout.replace(b"\r\n", b"\n")
+        head, _, body = output.partition(b"\n\n")
+        lines = head.decode("utf-8", errors="replace").splitlines()
+        if not lines or not lines[0].startswith("HTTP/"):
+            raise GitHubError(f"gh api failed: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        status = int(lines[0].split()[1])
+        response_headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        return status, response_headers, body
+
+    # --- REST -------------------------------------------------------------
+
+    def cache_key(self, url: str) -> str:
+        # 認証情報ごとに見えるデータが違うので、トークンのハッシュもキーに含める
+        identity = hashlib.sha256(self.token.encode("utf-8")).hexdigest()[:16] if self.token else self.transport
+        return hashlib.sha256(f"{identity} GET {url}".encode("utf-8")).hexdigest()
+
+    def get(self, path: str, refresh: bool = False):
+        """GET a REST endpoint (e.g. "repos/o/r/issues/1") and return its decoded JSON.
+
+        Repeated calls in one process are answered from memory unless refresh=True;
+        otherwise a cached ETag is sent and a 304 reply reuses the stored body.
+        """
+        path = path.lstrip("/")
+        url = f"{self.api_url}/{path}"
+        if not refresh and url in self._memo:
+            self.stats["memory_hits"] += 1
+            return self._memo[url]
+
+        with span("github.get", path=path, transport=self.transport) as s:
+            key = self.cache_key(url)
+            cached = self.cache.load(key) if self.cache else None
+            headers = {"If-None-Match": cached["etag"]} if cached else {}
+
+            self.stats["requests"] += 1
+            if self.transport == "gh":
+                status, response_headers, body = self._gh_api([path], headers)
+            else:
+                status, response_headers, body = self._http("GET", url, headers=headers)
+
+            if status == 304 and cached:
+                self.stats["not_modified"] += 1
+                self.cache.touch(key)
+                text = cached["body"]
+                s.set(cache="not_modified")
+            elif 200 <= status < 300:
+                text = body.decode("utf-8")
+                if self.cache and response_headers.get("etag"):
+                    self.cache.store(key, url, response_headers["etag"], text)
+                s.set(cache="changed" if cached else "miss")
+            else:
+                raise GitHubError(f"GET {path}: HTTP {status}: {body[:200]!r}", status)
+
+        data = json.loads(text) if text else None
+        self._memo[url] = data
+        return data
+
+    def issue(self, number: str | int, repository: tuple[str, str] | None = None) -> dict:
+        """Return the REST representation of an issue (title, body, ...)."""
+        owner, name = repository or detect_repository() or ("", "")
+        if not owner:
+            raise GitHubError("could not determine the repository (set GITHUB_REPOSITORY)")
+        return self.get(f"repos/{owner}/{name}/issues/{number}")
+
+    # --- GraphQL ----------------------------------------------------------
+
+    def graphql(self, query: str, variables: dict) -> dict:
+        """Run a GraphQL query and return its data (never cached)."""
+        self.stats["requests"] += 1
+        if self.transport == "http":
+            body = json.dumps({"query": query, "variables": variables}).encode("utf-8")
+            status, _, payload = self._http("POST", self.graphql_url, body, {"Content-Type": "application/json"})
+        elif self.transport == "gh":
+            args = ["graphql", "-f", f"query={query}"]
+            for key, value in variables.items():
+                if value is None:
+                    continue
+                # -F は数値と真偽値を変換し、-f は文字列のまま渡す
+                if isinstance(value, bool):
+                    args += ["-F", f"{key}={str(value).lower()}"]
+                elif isinstance(value, int):
+                    args += ["-F", f"{key}={value}"]
+                else:
+                    args += ["-f", f"{key}={value}"]
+            status, _, payload = self._gh_api(args)
+        else:
+            raise GitHubError("GraphQL needs GH_TOKEN/GITHUB_TOKEN or the gh CLI")
+
+        if status != 200:
+            raise GitHubError(f"GraphQL: HTTP {status}: {payload[:200]!r}", status)
+        result = json.loads(payload)
+        if result.get("errors"):
+            raise GitHubError("; ".join(error.get("message", "") for error in result["errors"]))
+        return result["data"]
+
+    def close(self) -> None:
+        """Close the connections of every thread; call it once no request is in flight."""
+        with self._connections_lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+
+    def __enter__(self) -> "GitHubClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
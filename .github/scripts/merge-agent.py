@@ -2,69 +2,385 @@
 """Issueからキャラクターとタスクを抽出して、エージェントファイルをCLAUDE.mdにマージするスクリプト"""
 
 import json
+import os
 import re
-import subprocess
 import sys
-
-
-def run_command(cmd: list[str]) -> str:
-    """Run command and return output."""
-    result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-    return result.stdout.strip()
+import tempfile
+import textwrap
+import threading
+from collections import OrderedDict
+
+from github_client import GitHubClient, GitHubError
+from pipeline_trace import span
+
+
+def fetch_issue_body(issue_number: str) -> str:
+    """Issue Bodyを取得（共有クライアントのETagキャッシュ経由）"""
+    try:
+        with GitHubClient() as client:
+            issue = client.issue(issue_number)
+    except (GitHubError, OSError, ValueError) as e:
+        print(f"[ERROR] Failed to fetch issue #{issue_number}: {e}", file=sys.stderr)
+        return ""
+    return ((issue or {}).get("body") or "").strip()
+
+
+# Issue Body の見出し（`キャラクター:` / `タスク:` / `パラメータ:`）
+# キーワードから始まるパターンにして、見出しでない位置では走査がすぐ進むようにする
+# 値は含めない（同じ行の後ろにある `タスク:` なども拾えるように）
+ISSUE_KEY_PATTERN = re.compile(r'(?P<key>キャラクター|タスク\d*|パラメーター?)(?:\*\*)?[ \t]*[：:](?:\*\*)?[ \t]*')
+# 行の途中の `キャラクター:` / `タスク:` の値（従来の re.search と同じく、空なら次の行まで読む）
+INLINE_VALUE_PATTERN = re.compile(r'\s*([^\n]+)')
+# 見出しの前に置けるのは字下げと、箇条書き・番号・見出し・太字の記号だけ
+HEADING_PREFIX_PATTERN = re.compile(r'[ \t]*(?:[-*+][ \t]+|\d+[.)][ \t]+|#{1,6}[ \t]+)?(?:\*\*)?')
+BLANK_LINE_PATTERN = re.compile(r'\n[ \t]*\n')
+PARAM_LINE_PATTERN = re.compile(r'^[ \t]*(?:[-*+][ \t]+)?(?P<name>[^\s:：=][^:：=\n]*?)[ \t]*[:：=][ \t]*(?P<value>.*?)[ \t]*$')
+ISSUE_PARSE_CACHE_SIZE = 256
+
+# 本文そのものをキーにした LRU（ハッシュだけのキーだと衝突した本文同士で結果が入れ替わる）
+_issue_parse_cache: "OrderedDict[str, dict]" = OrderedDict()
+_issue_parse_lock = threading.Lock()
+
+
+def read_block(issue_body: str, start: int, end: int, inline: str) -> str:
+    """見出しの後ろのブロックを取り出す
+
+    見出し行に値があればその行と、続くインデントされた行（継続行）。
+    値がなければ次の行から空行・次の見出しまで。``` で始まる場合は閉じフェンスまで。
+    どちらも start..end（次の見出しまで）の範囲しか見ない。
+    """
+    if inline:
+        lines = [inline]
+        position = start
+        while position < end:
+            line_end = issue_body.find("\n", position + 1, end)
+            line_end = end if line_end == -1 else line_end
+            line = issue_body[position + 1:line_end]
+            if not line[:1].isspace() or not line.strip():
+                break
+            lines.append(line.strip())
+            position = line_end
+        return "\n".join(lines)
+
+    # 見出しの直後の空行は飛ばす（字下げを残すため行頭から始める）
+    content = start
+    while content < end and issue_body[content] in " \t\r\n":
+        content += 1
+    start = issue_body.rfind("\n", start, content) + 1 or start
+    if issue_body.startswith("```", content):
+        fence_end = issue_body.find("\n```", content + 3, end)
+        if fence_end != -1:
+            body_start = issue_body.find("\n", content, fence_end + 1) + 1
+            return issue_body[body_start:fence_end].strip("\n")
+    blank = BLANK_LINE_PATTERN.search(issue_body, content, end)
+    return textwrap.dedent(issue_body[start:blank.start() if blank else end]).strip()
+
+
+def parse_params(block: str) -> dict[str, str]:
+    """`key: value` / `key=value` 形式の行を辞書にする"""
+    params = {}
+    for line in block.splitlines():
+        match = PARAM_LINE_PATTERN.match(line)
+        if match:
+            params[match.group("name").strip()] = match.group("value")
+    return params
+
+
+def tokenize_issue_body(issue_body: str) -> dict:
+    """Issue Bodyを1回だけ走査して、キャラクター・タスク・パラメータを取り出す
+
+    行頭の見出しはブロックとして読む。「使用するキャラクター: x」のように行の途中に
+    あるものは、同じ種類の見出しがひとつもないときだけ、その行の値を使う。
+    """
+    character_file = None
+    tasks = []
+    params = {}
+
+    matches = []
+    inline_matches = []
+    for match in ISSUE_KEY_PATTERN.finditer(issue_body):
+        line_start = issue_body.rfind("\n", 0, match.start()) + 1
+        if HEADING_PREFIX_PATTERN.fullmatch(issue_body, line_start, match.start()):
+            matches.append(match)
+        else:
+            inline_matches.append(match)
+    for i, match in enumerate(matches):
+        key = match.group("key")
+        line_end = issue_body.find("\n", match.end())
+        line_end = len(issue_body) if line_end == -1 else line_end
+        inline = issue_body[match.end():line_end].strip()
+        # 次の見出しまでをこの見出しのブロックとする
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(issue_body)
+        block = read_block(issue_body, line_end, end, inline)
+        if key == "キャラクター":
+            # 最初の指定を使う
+            if character_file is None and block:
+                character_file = block.splitlines()[0].strip()
+        elif key.startswith("タスク"):
+            if block:
+                tasks.append(block)
+        else:
+            params.update(parse_params(block))
+
+    if character_file is None or not tasks:
+        task_heading = bool(tasks)
+        for match in inline_matches:
+            key = match.group("key")
+            value = INLINE_VALUE_PATTERN.match(issue_body, match.end())
+            if value is None:
+                continue
+            if key == "キャラクター":
+                if character_file is None:
+                    character_file = value.group(1).strip()
+            elif key.startswith("タスク") and not task_heading:
+                tasks.append(value.group(1).strip())
+
+    return {
+        "character_file": character_file,
+        "task": tasks[0] if tasks else None,
+        "tasks": tasks,
+        "params": params,
+    }
 
 
 def parse_issue_body(issue_body: str) -> dict:
-    """Issue Bodyからキャラクターとタスクを抽出"""
-    print(f"[DEBUG] Issue Body:\n{issue_body}", file=sys.stderr)
+    """Issue Bodyからキャラクターとタスクを抽出（本文ごとに LRU でメモ化）"""
+    # 巨大な本文（貼り付けられたログなど）は全文を出さず、大きさと先頭行だけ出す
+    first_line = issue_body[:80].split("\n", 1)[0]
+    print(f"[DEBUG] Issue Body: {len(issue_body)} chars, first line: {first_line!r}", file=sys.stderr)
+
+    # str のハッシュは文字列オブジェクトにキャッシュされるので、同じ本文なら2回目以降の引き当ては安い
+    # （一致の判定は文字列の比較なので、ハッシュが衝突しても別の本文の結果は返らない）
+    with _issue_parse_lock:
+        parsed = _issue_parse_cache.get(issue_body)
+        if parsed is not None:
+            _issue_parse_cache.move_to_end(issue_body)
+    if parsed is None:
+        with span("issue.parse", chars=len(issue_body)) as s:
+            parsed = tokenize_issue_body(issue_body)
+            s.set(tasks=len(parsed["tasks"]))
+        with _issue_parse_lock:
+            _issue_parse_cache[issue_body] = parsed
+            _issue_parse_cache.move_to_end(issue_body)
+            while len(_issue_parse_cache) > ISSUE_PARSE_CACHE_SIZE:
+                _issue_parse_cache.popitem(last=False)
+
+    print(f"[DEBUG] Character File: {parsed['character_file']}", file=sys.stderr)
+    print(f"[DEBUG] Tasks: {len(parsed['tasks'])}", file=sys.stderr)
+    for number, task in enumerate(parsed["tasks"], 1):
+        print(f"[DEBUG] Task {number}: {task.splitlines()[0][:120]}", file=sys.stderr)
+    if parsed["params"]:
+        print(f"[DEBUG] Params: {', '.join(parsed['params'])}", file=sys.stderr)
+
+    # キャッシュした辞書を呼び出し側が書き換えないように浅いコピーを返す
+    return {**parsed, "tasks": list(parsed["tasks"]), "params": dict(parsed["params"])}
+
+
+AGENT_ROOTS = [".github/agents", ".claude/agents", "agents"]
+AGENT_INDEX_VERSION = 1
+
+
+def default_index_path() -> str:
+    """エージェントインデックスの保存先（AGENT_INDEX_PATH または ~/.cache/merge-agent/agents-index.json）"""
+    if os.getenv("AGENT_INDEX_PATH"):
+        return os.environ["AGENT_INDEX_PATH"]
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "merge-agent", "agents-index.json")
+
+
+def split_frontmatter(content: str) -> tuple[str | None, str]:
+    """YAML frontmatter と本文に分ける（`---` で囲まれた先頭ブロック、なければ None）"""
+    if content.startswith("---\n"):
+        end = content.find("\n---\n", 4)
+        if end != -1:
+            return content[4:end], content[end + 5:]
+    return None, content
+
+
+def parse_frontmatter(frontmatter: str) -> dict:
+    """frontmatter を辞書にする（PyYAML がなければトップレベルの `key: value` だけ読む）"""
+    if not frontmatter:
+        return {}
+    try:
+        import yaml
+    except ImportError:
+        yaml = None
+    if yaml is not None:
+        try:
+            data = yaml.safe_load(frontmatter)
+            return data if isinstance(data, dict) else {}
+        except yaml.YAMLError:
+            return {}
+    data = {}
+    for line in frontmatter.splitlines():
+        if line[:1].isspace() or ":" not in line:
+            continue
+        key, _, value = line.partition(":")
+        data[key.strip()] = value.strip().strip("'\"")
+    return data
 
-    # 「下記のキャラクターを演じて」の後ろにあるキャラクターファイルを抽出
-    character_match = re.search(r'キャラクター[：:]\s*([^\n]+)', issue_body)
-    character_file = character_match.group(1).strip() if character_match else None
 
-    # 「下記のタスクを処理」の後ろにあるタスクを抽出
-    task_match = re.search(r'タスク[：:]\s*([^\n]+)', issue_body)
-    task = task_match.group(1).strip() if task_match else None
+class AgentRegistry:
+    """エージェントファイルの索引
 
-    print(f"[DEBUG] Character File: {character_file}", file=sys.stderr)
-    print(f"[DEBUG] Task: {task}", file=sys.stderr)
+    AGENT_ROOTS を一度だけ走査し、各ファイルの frontmatter を解析して
+    相対パス・ファイル名・frontmatter の name で引けるようにする。
+    解析結果は mtime とサイズつきでインデックスファイルに保存し、
+    変わっていないファイルは次回以降読み直さない。
+    """
 
-    return {"character_file": character_file, "task": task}
+    def __init__(self, roots: list[str] | None = None, index_path: str | None = None):
+        self.roots = roots or AGENT_ROOTS
+        self.index_path = index_path or default_index_path()
+        self.entries: dict[str, dict] = {}
+        self.lookup: dict[str, dict] = {}
+        self.parsed = 0
 
+    def load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict) or index.get("version") != AGENT_INDEX_VERSION:
+            return {}
+        return index.get("entries", {})
+
+    def save_index(self) -> None:
+        try:
+            directory = os.path.dirname(self.index_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": AGENT_INDEX_VERSION, "entries": self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"[DEBUG] Could not save agent index: {e}", file=sys.stderr)
+
+    def scan(self) -> "AgentRegistry":
+        """ルートを走査して索引を作る（変更のないファイルはインデックスから再利用）"""
+        with span("agents.scan") as s:
+            self._scan()
+            s.set(agents=len(self.entries), parsed=self.parsed)
+        return self
+
+    def _scan(self) -> None:
+        cached = self.load_index()
+        self.entries = {}
+        self.lookup = {}
+        by_name = {}
+        by_stem = {}
+
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            for directory, _, files in os.walk(root):
+                for file_name in sorted(files):
+                    if not file_name.endswith(".md"):
+                        continue
+                    path = os.path.join(directory, file_name)
+                    entry = self.index_file(path, cached.get(os.path.abspath(path)))
+                    if entry is None:
+                        continue
+                    self.entries[os.path.abspath(path)] = entry
+                    # 同じ相対パスは AGENT_ROOTS の順で先にあるものを優先する
+                    self.lookup.setdefault(os.path.relpath(path, root).replace(os.sep, "/"), entry)
+                    by_stem.setdefault(os.path.splitext(file_name)[0], entry)
+                    name = entry["metadata"].get("name")
+                    if isinstance(name, str) and name:
+                        by_name.setdefault(name, entry)
+
+        # 相対パス > frontmatter の name > 拡張子なしのファイル名 の順で引く
+        for key, entry in list(by_name.items()) + list(by_stem.items()):
+            self.lookup.setdefault(key, entry)
+
+        if self.parsed or len(self.entries) != len(cached):
+            self.save_index()
+
+    def index_file(self, path: str, cached: dict | None) -> dict | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if cached and cached.get("mtime_ns") == stat.st_mtime_ns and cached.get("size") == stat.st_size:
+            return cached
 
-def load_agent_file(character_file: str) -> str:
-    """エージェントファイルを読み込む"""
-    # `.github/agents/` または `.claude/agents/` を探索
-    for base_path in [".github/agents", ".claude/agents", "agents"]:
-        full_path = f"{base_path}/{character_file}"
         try:
-            with open(full_path, "r", encoding="utf-8") as f:
+            with open(path, "r", encoding="utf-8") as f:
                 content = f.read()
-            print(f"[DEBUG] Loaded agent from: {full_path}", file=sys.stderr)
-            return content
-        except FileNotFoundError:
-            continue
-
-    print(f"[ERROR] Agent file not found: {character_file}", file=sys.stderr)
-    return ""
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"[DEBUG] Skipping agent file {path}: {e}", file=sys.stderr)
+            return None
+        self.parsed += 1
+        frontmatter, body = split_frontmatter(content)
+        return {
+            "path": path,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "frontmatter": frontmatter,
+            "metadata": parse_frontmatter(frontmatter),
+            "body": body,
+        }
+
+    def get(self, key: str) -> dict | None:
+        """相対パス・frontmatter の name・ファイル名でエージェントを引く"""
+        key = key.strip()
+        if key.startswith("./"):
+            key = key[2:]
+        return self.lookup.get(key) or self.lookup.get(os.path.splitext(key)[0])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def find_agent(character_file: str, registry: AgentRegistry | None = None) -> dict | None:
+    """索引からエージェントを引く"""
+    entry = (registry or AgentRegistry().scan()).get(character_file)
+    if entry is None:
+        print(f"[ERROR] Agent file not found: {character_file}", file=sys.stderr)
+        return None
+    print(f"[DEBUG] Loaded agent from: {entry['path']}", file=sys.stderr)
+    return entry
+
+
+def load_agent_file(character_file: str, registry: AgentRegistry | None = None) -> str:
+    """エージェントファイルを読み込む"""
+    entry = find_agent(character_file, registry)
+    if entry is None:
+        return ""
+    if entry["frontmatter"] is None:
+        return entry["body"]
+    return f"---\n{entry['frontmatter']}\n---\n{entry['body']}"
 
 
-def create_claude_md(character_content: str, task: str) -> str:
+def create_claude_md(character_content: str, task: str, params: dict | None = None) -> str:
     """CLAUDE.mdを作成"""
     # YAML frontmatter部分を抽出（もしあれば）
-    yaml_match = re.match(r'^---\n(.*?)\n---\n', character_content, re.DOTALL)
-    if yaml_match:
-        yaml_frontmatter = yaml_match.group(1)
-        character_body = character_content[yaml_match.end():]
-    else:
-        yaml_frontmatter = ""
-        character_body = character_content
+    yaml_frontmatter, character_body = split_frontmatter(character_content)
+    return build_claude_md(yaml_frontmatter or "", character_body, task, params)
+
+
+def format_tasks(tasks: list[str]) -> str:
+    """タスクが複数あれば番号つきリストにする（複数行のタスクは字下げして続ける）"""
+    if len(tasks) <= 1:
+        return tasks[0] if tasks else ""
+    items = []
+    for number, task in enumerate(tasks, 1):
+        first, *rest = task.splitlines() or [""]
+        items.append("\n".join([f"{number}. {first}"] + [f"   {line}" if line else "" for line in rest]))
+    return "\n".join(items)
+
 
+def build_claude_md(yaml_frontmatter: str, character_body: str, task: str, params: dict | None = None) -> str:
+    """frontmatter と本文からCLAUDE.mdを組み立てる"""
     # タスクを追加
     task_section = f"""
 
 ## 現在のタスク
 {task}
 """
+    if params:
+        task_section += "\n## パラメータ\n" + "".join(f"- {name}: {value}\n" for name, value in params.items())
 
     claude_md = f"""---
 {yaml_frontmatter}
@@ -79,42 +395,152 @@ def create_claude_md(character_content: str, task: str) -> str:
     return claude_md
 
 
+def build_issue_claude_md(issue_body: str, registry: AgentRegistry) -> str:
+    """Issue BodyからCLAUDE.mdの内容を作る"""
+    # キャラクターとタスクを抽出
+    parsed = parse_issue_body(issue_body)
+    task = format_tasks(parsed["tasks"])
+
+    if not task:
+        print("[INFO] No task specified", file=sys.stderr)
+
+    if not parsed["character_file"]:
+        print("[INFO] No character specified, using default", file=sys.stderr)
+        return create_claude_md("# デフォルトキャラクター\n\nあなたは有用なアシスタントです。", task, parsed["params"])
+
+    entry = find_agent(parsed["character_file"], registry)
+    if entry is None:
+        return create_claude_md("", task, parsed["params"])
+    return build_claude_md(entry["frontmatter"] or "", entry["body"], task, parsed["params"])
+
+
+def write_atomic(path: str, content: str) -> None:
+    """一時ファイルに書いてから置き換える（途中で落ちても中途半端なファイルを残さない）"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".md")
+    try:
+        with span("file.write", path=path, chars=len(content)):
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def parse_issue_numbers(spec: str) -> list[str]:
+    """"12,15,20-25" のような指定をIssue番号のリストにする（重複は除く）"""
+    numbers = []
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        start, sep, end = part.partition("-")
+        if not start.isdigit() or (sep and not end.isdigit()):
+            raise ValueError(f"Invalid issue number or range: {part}")
+        if sep:
+            if int(end) < int(start):
+                raise ValueError(f"Invalid issue range: {part}")
+            numbers.extend(str(n) for n in range(int(start), int(end) + 1))
+        else:
+            numbers.append(start)
+    return list(dict.fromkeys(numbers))
+
+
+def run_batch(issue_numbers: list[str], output_dir: str, name_template: str, workers: int) -> int:
+    """複数のIssueのCLAUDE.mdを並行して作り、失敗したIssueの数を返す"""
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    # エージェントの索引は全Issueで共有する（走査と解析は1回だけ）
+    registry = AgentRegistry().scan()
+    # クライアントは全ワーカーで共有する（接続はクライアントの中でスレッドごとに分かれる）
+    client = GitHubClient()
+
+    def fetch(issue_number: str) -> str:
+        issue = client.issue(issue_number)
+        body = ((issue or {}).get("body") or "").strip()
+        if not body:
+            raise ValueError("empty issue body")
+        return body
+
+    start = time.perf_counter()
+    results: dict[str, str] = {}
+    failures: dict[str, str] = {}
+    with client, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {number: pool.submit(fetch, number) for number in issue_numbers}
+        for number, future in futures.items():
+            try:
+                results[number] = build_issue_claude_md(future.result(), registry)
+            except (GitHubError, OSError, ValueError) as e:
+                failures[number] = str(e)
+            except Exception as e:
+                # 壊れたペイロード（KeyError / TypeError など）でもバッチ全体は止めず、そのIssueの失敗として残す
+                failures[number] = f"{type(e).__name__}: {e}"
+    fetched = time.perf_counter() - start
+
+    # 取得と生成がすべて終わってから書き出す
+    for number, claude_md in results.items():
+        output_file = os.path.join(output_dir, name_template.format(issue=number))
+        try:
+            write_atomic(output_file, claude_md)
+            print(f"[SUCCESS] Created {output_file}", file=sys.stderr)
+        except OSError as e:
+            failures[number] = f"write failed: {e}"
+
+    elapsed = time.perf_counter() - start
+    succeeded = len(issue_numbers) - len(failures)
+    print(
+        f"[INFO] Batch: {succeeded}/{len(issue_numbers)} issues in {elapsed:.2f}s "
+        f"({len(issue_numbers) / elapsed if elapsed else 0:.1f} issues/s, fetch {fetched:.2f}s, "
+        f"{workers} workers, {len(registry)} agents indexed / {registry.parsed} parsed)",
+        file=sys.stderr
+    )
+    for number, reason in failures.items():
+        print(f"[ERROR] Issue #{number}: {reason}", file=sys.stderr)
+    return len(failures)
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        import argparse
+
+        parser = argparse.ArgumentParser(
+            prog="merge-agent.py --batch",
+            description="複数のIssueからCLAUDE.mdをまとめて作成する"
+        )
+        parser.add_argument("issues", help="Issue番号（カンマ区切りと範囲指定が可能 例: 12,15,20-30）")
+        parser.add_argument("--output-dir", default=".", help="出力ディレクトリ")
+        parser.add_argument("--name-template", default="CLAUDE-{issue}.md", help="出力ファイル名（{issue} がIssue番号）")
+        parser.add_argument("--workers", type=int, default=8, help="同時に取得するIssueの数")
+        args = parser.parse_args(sys.argv[2:])
+        try:
+            issue_numbers = parse_issue_numbers(args.issues)
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit(1 if run_batch(issue_numbers, args.output_dir, args.name_template, max(1, args.workers)) else 0)
+
     if len(sys.argv) < 3:
         print("Usage: python3 .github/scripts/merge-agent.py <issue_number> <output_file>", file=sys.stderr)
+        print("       python3 .github/scripts/merge-agent.py --batch <issues> [--output-dir DIR] [--workers N]", file=sys.stderr)
         sys.exit(1)
 
     issue_number = sys.argv[1]
     output_file = sys.argv[2]
 
     # Issue Bodyを取得
-    issue_body = run_command([
-        "gh", "issue", "view", issue_number,
-        "--json", "body", "--jq", ".body"
-    ])
+    issue_body = fetch_issue_body(issue_number)
 
     if not issue_body:
         print("[ERROR] Could not get issue body", file=sys.stderr)
         sys.exit(1)
 
-    # キャラクターとタスクを抽出
-    parsed = parse_issue_body(issue_body)
-
-    if not parsed["character_file"]:
-        print("[INFO] No character specified, using default", file=sys.stderr)
-        character_content = "# デフォルトキャラクター\n\nあなたは有用なアシスタントです。"
-    else:
-        character_content = load_agent_file(parsed["character_file"])
-
-    if not parsed["task"]:
-        print("[INFO] No task specified", file=sys.stderr)
-
     # CLAUDE.mdを作成
-    claude_md = create_claude_md(character_content, parsed["task"] or "")
+    claude_md = build_issue_claude_md(issue_body, AgentRegistry().scan())
 
-    # ファイルに書き込み
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(claude_md)
+    # ファイルに書き込み（バッチと同じく一時ファイル経由で置き換える）
+    write_atomic(output_file, claude_md)
 
     print(f"[SUCCESS] Created {output_file}", file=sys.stderr)
 
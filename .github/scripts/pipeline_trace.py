@@ -0,0 +1,155 @@
+"""Span tracing for the scripts in .github/scripts.
+
+Set PIPELINE_TRACE_FILE to record how long each step takes (subprocesses,
+GitHub and fal.ai calls, downloads, renders, file writes):
+
+    PIPELINE_TRACE_FILE=trace.jsonl python3 .github/scripts/create-pr.py ...
+    PIPELINE_TRACE_FILE=trace.json  python3 .github/scripts/generate-header.py ...
+
+Every record is a Chrome trace event ("ph": "X" with ts/dur in microseconds).
+A `.json` file is written in Chrome's JSON array format and opens directly in
+chrome://tracing or ui.perfetto.dev; any other name gets one event per line
+(PIPELINE_TRACE_FORMAT=chrome|jsonl overrides the choice). Several processes
+can append to the same file, and timestamps are wall-clock aligned so their
+spans line up.
+
+When PIPELINE_TRACE_FILE is unset, span() returns a shared no-op object and
+nothing else is imported, so instrumented code pays one function call.
+
+    with span("github.get", path=path) as s:
+        ...
+        s.set(status=status, bytes=len(body))
+
+Large payloads (issue and PR bodies) should go through sample_payload()
+before they are logged or attached to a span.
+"""
+
+import os
+import sys
+import time
+
+TRACE_FILE = os.getenv("PIPELINE_TRACE_FILE", "")
+TRACE_FORMAT = os.getenv("PIPELINE_TRACE_FORMAT") or ("chrome" if TRACE_FILE.endswith(".json") else "jsonl")
+PAYLOAD_SAMPLE_CHARS = int(os.getenv("PIPELINE_TRACE_PAYLOAD_CHARS", "200"))
+
+
+def sample_payload(text: str | bytes | None, limit: int = PAYLOAD_SAMPLE_CHARS) -> str:
+    """Return text unchanged if it is short, otherwise its head and tail with the omitted size."""
+    if not text:
+        return ""
+    if len(text) <= limit:
+        return text.decode("utf-8", errors="replace") if isinstance(text, bytes) else text
+    head = limit * 2 // 3
+    tail = limit - head
+    if isinstance(text, bytes):
+        return (f"{text[:head].decode('utf-8', errors='replace')} … [{len(text) - limit} bytes omitted] … "
+                f"{text[-tail:].decode('utf-8', errors='replace')}")
+    return f"{text[:head]} … [{len(text) - limit} chars omitted] … {text[-tail:]}"
+
+
+class NoopSpan:
+    """Returned by span() when tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class TraceWriter:
+    """Append Chrome trace events to a file, one event per write, from any thread."""
+
+    def __init__(self, path: str, trace_format: str):
+        import json
+        import threading
+
+        self._dumps = json.dumps
+        self._lock = threading.Lock()
+        self._thread_id = threading.get_native_id
+        self.chrome = trace_format == "chrome"
+        # perf_counter_ns を壁時計に揃え、別プロセスのスパンと並べられるようにする
+        self.offset_ns = time.time_ns() - time.perf_counter_ns()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8", buffering=1)
+        if self.chrome and self.file.tell() == 0:
+            # 閉じ括弧は省略できる形式なので、途中で落ちても読み込める
+            self.file.write("[\n")
+        self.write_event({
+            "name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0,
+            "args": {"name": os.path.basename(sys.argv[0]) or "python"},
+        })
+
+    def write_event(self, event: dict) -> None:
+        line = self._dumps(event, ensure_ascii=False, default=str) + (",\n" if self.chrome else "\n")
+        with self._lock:
+            self.file.write(line)
+
+    def write_span(self, name: str, start_ns: int, end_ns: int, attrs: dict) -> None:
+        self.write_event({
+            "name": name,
+            "cat": name.partition(".")[0],
+            "ph": "X",
+            "ts": (start_ns + self.offset_ns) // 1000,
+            "dur": (end_ns - start_ns) // 1000,
+            # fork したワーカーからも書けるように、pid は毎回取り直す
+            "pid": os.getpid(),
+            "tid": self._thread_id(),
+            "args": attrs,
+        })
+
+
+class Span:
+    """A timed region; attributes can be added with set() before it ends."""
+
+    __slots__ = ("name", "attrs", "start_ns")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = 0
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {sample_payload(str(exc))}"
+        _writer.write_span(self.name, self.start_ns, end_ns, self.attrs)
+        return False
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+def _open_writer() -> TraceWriter | None:
+    if not TRACE_FILE:
+        return None
+    try:
+        return TraceWriter(TRACE_FILE, TRACE_FORMAT)
+    except OSError as e:
+        print(f"[DEBUG] Tracing disabled, could not open {TRACE_FILE}: {e}", file=sys.stderr)
+        return None
+
+
+_writer = _open_writer()
+
+
+def span(name: str, **attrs) -> Span | NoopSpan:
+    """Time a block as `name` (dotted, e.g. "github.get"; the first part becomes the category)."""
+    if _writer is None:
+        return NOOP_SPAN
+    return Span(name, attrs)
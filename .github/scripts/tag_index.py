@@ -0,0 +1,189 @@
+"""Semver index of a repository's release tags.
+
+Every tag is parsed once with a precompiled semver grammar (optional v/V
+prefix, prereleases, build metadata) and kept in precedence order, so release
+tooling can classify thousands of tags in one call and find the previous
+release of a tag with a binary search instead of a `git describe` per lookup.
+
+    index = TagIndex.from_git()
+    index.previous("v1.10.0")            # "v1.9.3" (prereleases are skipped)
+    index.themes()                       # {"v1.0.0": "first", "v1.0.1": "patch", ...}
+    index.between("v1.0.0", "v1.4.0")    # both ends included
+
+Tags that are not semver (e.g. "nightly") are kept in `unparsed` and never
+returned by previous() or between().
+
+This module is shared by the scripts in .github/scripts and is also run by
+auto-release-notes.yml:
+
+    python3 .github/scripts/tag_index.py previous v1.10.0
+    python3 .github/scripts/tag_index.py themes v1.0.0 v1.10.0 v2.0.0-rc.1
+"""
+
+import bisect
+import re
+import subprocess
+import sys
+
+SEMVER_PATTERN = re.compile(
+    r"[vV]?(\d+)\.(\d+)\.(\d+)"
+    r"(?:-([0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?"
+    r"(?:\+[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*)?"
+)
+
+# 正式リリースはプレリリースより後ろに並ぶ（semver の優先順位）
+PRERELEASE = 0
+RELEASE = 1
+
+DEFAULT_THEME = "feature"
+
+
+def parse_tag(tag: str) -> tuple | None:
+    """Return the precedence key of a semver tag, or None if it is not one.
+
+    Keys compare like semver versions: (major, minor, patch, RELEASE, ()) for
+    a release and (major, minor, patch, PRERELEASE, identifiers) for a
+    prerelease. Build metadata is ignored.
+    """
+    match = SEMVER_PATTERN.fullmatch(tag)
+    if not match:
+        return None
+    major, minor, patch, prerelease = match.groups()
+    if prerelease is None:
+        return (int(major), int(minor), int(patch), RELEASE, ())
+    # 数字だけの識別子は数値として比べ、英数字の識別子より前に並べる
+    identifiers = tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in prerelease.split(".")
+    )
+    return (int(major), int(minor), int(patch), PRERELEASE, identifiers)
+
+
+def theme_for_version(major: int, minor: int, patch: int) -> str:
+    """Header theme of a version ("first", "major", "feature" or "patch")."""
+    if (major, minor, patch) in ((0, 1, 0), (1, 0, 0)):
+        return "first"
+    if patch:
+        return "patch"
+    if minor:
+        return "feature"
+    return "major"
+
+
+def classify_tag(tag: str) -> str:
+    """Header theme of one tag; prereleases use their core version."""
+    # 優先順位のキーは要らないので、プレリリースの識別子は分解しない
+    match = SEMVER_PATTERN.fullmatch(tag)
+    if not match:
+        return DEFAULT_THEME
+    return theme_for_version(int(match[1]), int(match[2]), int(match[3]))
+
+
+def classify_tags(tags: list[str]) -> dict[str, str]:
+    """Header themes of many tags at once."""
+    return {tag: classify_tag(tag) for tag in tags}
+
+
+def list_git_tags(cwd: str | None = None) -> list[str]:
+    """All tag names of the repository, in git's order."""
+    result = subprocess.run(["git", "tag", "--list"], capture_output=True, text=True, check=False, cwd=cwd)
+    return result.stdout.split()
+
+
+class TagIndex:
+    """Semver tags sorted by precedence, with binary-search lookups.
+
+    Parallel lists keep the keys and names; releases also get their own pair
+    of lists so previous() stays a single bisect when prereleases are skipped.
+    """
+
+    def __init__(self, tags: list[str]):
+        parsed = []
+        self.unparsed = []
+        for tag in tags:
+            key = parse_tag(tag)
+            if key is None:
+                self.unparsed.append(tag)
+            else:
+                parsed.append((key, tag))
+        parsed.sort()
+
+        self.keys = [key for key, _ in parsed]
+        self.tags = [tag for _, tag in parsed]
+        self.release_keys = [key for key in self.keys if key[3] == RELEASE]
+        self.release_tags = [tag for key, tag in parsed if key[3] == RELEASE]
+        self._names = set(self.tags)
+
+    @classmethod
+    def from_git(cls, cwd: str | None = None) -> "TagIndex":
+        return cls(list_git_tags(cwd))
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._names
+
+    def previous(self, tag: str, prereleases: bool | None = None) -> str | None:
+        """The closest tag with lower precedence than `tag`, or None for the first release.
+
+        `tag` does not have to be in the index. Prereleases are only considered
+        when `tag` is itself a prerelease, unless `prereleases` says otherwise.
+        """
+        key = parse_tag(tag)
+        if key is None:
+            raise ValueError(f"not a semver tag: {tag}")
+        if prereleases is None:
+            prereleases = key[3] == PRERELEASE
+        keys, tags = (self.keys, self.tags) if prereleases else (self.release_keys, self.release_tags)
+        i = bisect.bisect_left(keys, key)
+        return tags[i - 1] if i else None
+
+    def between(self, start: str | None = None, end: str | None = None) -> list[str]:
+        """Tags from `start` to `end` by precedence, both included (open ends when omitted)."""
+        low = 0
+        high = len(self.keys)
+        if start:
+            if start not in self:
+                raise ValueError(f"tag not found: {start}")
+            low = bisect.bisect_left(self.keys, parse_tag(start))
+        if end:
+            if end not in self:
+                raise ValueError(f"tag not found: {end}")
+            high = bisect.bisect_right(self.keys, parse_tag(end))
+        return self.tags[low:high]
+
+    def themes(self) -> dict[str, str]:
+        """Header theme of every semver tag in the index."""
+        return {tag: theme_for_version(*key[:3]) for key, tag in zip(self.keys, self.tags)}
+
+
+def main(argv: list[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Semver index of the repository's tags")
+    commands = parser.add_subparsers(dest="command", required=True)
+    previous = commands.add_parser("previous", help="print the previous release of TAG (nothing for the first one)")
+    previous.add_argument("tag")
+    previous.add_argument("--prereleases", action="store_true", default=None, help="also consider prereleases")
+    themes = commands.add_parser("themes", help="print the header theme of each tag (all tags when none are given)")
+    themes.add_argument("tags", nargs="*")
+    args = parser.parse_args(argv)
+
+    if args.command == "previous":
+        try:
+            found = TagIndex.from_git().previous(args.tag, args.prereleases)
+        except ValueError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 1
+        if found:
+            print(found)
+        return 0
+
+    for tag, theme in classify_tags(args.tags or TagIndex.from_git().tags).items():
+        print(f"{tag}\t{theme}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))